@@ -1,30 +1,12 @@
 import streamlit as st
-import pandas as pd
-import os
-import re
+from utils.paths import ensure_data_dir
+from utils.activity_log import log_activity
+from utils.response_cache import get_cache
 
 st.set_page_config(page_title="AI+ Executive Innovation Hub", page_icon="🚀", layout="wide")
 
-# Directory for user analytics
-DATA_DIR = "user_data"
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
-
-def get_user_data_file(username, data_type="analytics"):
-    sanitized_username = re.sub(r'[^a-zA-Z0-9_]', '', username.lower())
-    return os.path.join(DATA_DIR, f"{sanitized_username}_{data_type}.csv")
-
-def log_activity(username, activity, details=""):
-    analytics_file = get_user_data_file(username, "analytics")
-    if os.path.exists(analytics_file):
-        df = pd.read_csv(analytics_file)
-    else:
-        df = pd.DataFrame(columns=["timestamp", "activity", "details"])
-    new_log = pd.DataFrame({
-        "timestamp": [pd.Timestamp.now()], "activity": [activity], "details": [details]
-    })
-    df = pd.concat([df, new_log], ignore_index=True)
-    df.to_csv(analytics_file, index=False)
+# Create user_data/ up front for the logs and caches the pages write
+ensure_data_dir()
 
 def main():
     # Load API key securely
@@ -51,6 +33,10 @@ def main():
     else:
         st.sidebar.success("✅ OpenAI API Key loaded securely!")
 
+    cache = get_cache()
+    hits = cache.stats["memory_hits"] + cache.stats["disk_hits"]
+    st.sidebar.caption(f"⚡ Response cache: {hits} hits, {cache.stats['misses']} misses ({cache.hit_rate():.0%} hit rate)")
+
     st.sidebar.markdown("---")
     st.title("🚀 AI+ Executive Innovation Hub")
     st.write("Select a tool from the sidebar to begin.")
@@ -0,0 +1,151 @@
+"""
+Measures cold import cost and time-to-first-render of the hub's pages.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --pages app.py pages/4_Text_to_Video_Generator.py --max-import-ms 800
+
+For every page, its top-level import statements are run in a fresh
+interpreter under `python -X importtime`, and the cumulative time of each
+top-level module is reported along with the heaviest ones. Time to first
+render runs the page once with streamlit.testing's AppTest (logged in, with a
+dummy API key in session state and secrets, no buttons pressed) in another fresh interpreter, counted from
+after streamlit itself has been imported.
+
+With --max-import-ms / --max-render-ms the script exits with status 1 when
+any page exceeds the budget, so it can gate CI against import-time
+regressions.
+"""
+import argparse
+import ast
+import glob
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RENDER_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2]))
+at.session_state["username"] = "bench"
+at.session_state["api_key"] = "sk-bench"
+at.secrets["OPENAI_API_KEY"] = "sk-bench"
+at.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "exceptions": [str(e.value) for e in at.exception]}))
+"""
+
+
+def page_imports(path):
+    """
+    Returns the source of a page's top-level import statements.
+    """
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    tree = ast.parse(source)
+    return "\n".join(
+        ast.get_source_segment(source, node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def parse_importtime(stderr):
+    """
+    Parses `-X importtime` output into (top-level modules, all modules), each
+    a list of (module, self_us, cumulative_us).
+    """
+    top_level, modules = [], []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = (part for part in line[len("import time:"):].split("|"))
+        entry = (name.strip(), int(self_us), int(cumulative_us))
+        modules.append(entry)
+        # Nested imports are indented under their importer
+        if not name[1:].startswith(" "):
+            top_level.append(entry)
+    return top_level, modules
+
+
+def _run_importtime(code):
+    return subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True)
+
+
+def interpreter_modules():
+    """
+    Modules imported by interpreter startup (site, encodings, ...), which
+    every page pays regardless of its own imports.
+    """
+    top_level, _ = parse_importtime(_run_importtime("pass").stderr)
+    return {name for name, _, _ in top_level}
+
+
+def measure_imports(path, baseline=frozenset()):
+    result = _run_importtime(page_imports(os.path.join(ROOT, path)))
+    top_level, _ = parse_importtime(result.stderr)
+    top_level = [entry for entry in top_level if entry[0] not in baseline]
+    error = result.stderr.strip().splitlines()[-1] if result.returncode else None
+    return sum(cumulative for _, _, cumulative in top_level) / 1000, top_level, error
+
+
+def measure_render(path, timeout):
+    result = subprocess.run(
+        [sys.executable, "-c", RENDER_SCRIPT, os.path.join(ROOT, path), str(timeout)],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode:
+        return None, result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    return data["seconds"] * 1000, "; ".join(data["exceptions"]) or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", nargs="+", default=None, help="Page files, relative to the repo root")
+    parser.add_argument("--top", type=int, default=3, help="Heaviest top-level imports to list per page")
+    parser.add_argument("--no-render", action="store_true", help="Only measure imports")
+    parser.add_argument("--render-timeout", type=float, default=60.0)
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-render-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    pages = args.pages or ["app.py"] + sorted(
+        (os.path.relpath(p, ROOT) for p in glob.glob(os.path.join(ROOT, "pages", "*.py"))),
+        key=lambda p: (len(p), p),
+    )
+
+    baseline = interpreter_modules()
+    failures = []
+    print(f"{'page':<42} {'imports ms':>10} {'render ms':>10}  heaviest imports")
+    for page in pages:
+        import_ms, top_level, import_error = measure_imports(page, baseline)
+        heaviest = ", ".join(
+            f"{name} {cumulative / 1000:.0f}ms"
+            for name, _, cumulative in sorted(top_level, key=lambda e: -e[2])[:args.top]
+        )
+        render_ms, render_error = (None, None) if args.no_render else measure_render(page, args.render_timeout)
+        render_text = "-" if render_ms is None else f"{render_ms:.0f}"
+        print(f"{page:<42} {import_ms:>10.0f} {render_text:>10}  {heaviest}")
+
+        for error in (import_error, render_error):
+            if error:
+                print(f"    error: {error}")
+        if import_error or (render_error and render_ms is None and not args.no_render):
+            failures.append(f"{page}: failed to load")
+        if args.max_import_ms is not None and import_ms > args.max_import_ms:
+            failures.append(f"{page}: imports took {import_ms:.0f} ms (budget {args.max_import_ms:.0f} ms)")
+        if args.max_render_ms is not None and render_ms is not None and render_ms > args.max_render_ms:
+            failures.append(f"{page}: first render took {render_ms:.0f} ms (budget {args.max_render_ms:.0f} ms)")
+
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Measures how long the video renderer takes per second of output video.
+
+Usage:
+    python benchmarks/bench_video_render.py --scenes 4 --seconds 5 --resolutions 720p 480p --presets ultrafast veryfast
+
+Scenes are synthetic 1024x1024 frames and the video is rendered without
+audio, so the numbers isolate zoom + encode cost from the API calls.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.video_render import ENCODER_PRESETS, RESOLUTIONS, render_video  # noqa: E402
+
+
+def synthetic_frames(count, size=1024, seed=0):
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size]
+    frames = []
+    for _ in range(count):
+        base = rng.integers(0, 255, size=3)
+        frame = np.stack([(x + y + c) % 256 for c in base], axis=-1).astype(np.uint8)
+        frames.append(frame)
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenes", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each scene")
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    parser.add_argument("--presets", nargs="+", default=["ultrafast", "veryfast"], choices=ENCODER_PRESETS)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    frames = synthetic_frames(args.scenes)
+    video_seconds = args.scenes * args.seconds
+
+    print(f"{'resolution':<16}{'preset':<12}{'render s':>10}{'s per video s':>16}")
+    with tempfile.TemporaryDirectory(prefix="bench_render_") as workdir:
+        for label in args.resolutions:
+            for preset in args.presets:
+                output = os.path.join(workdir, f"{RESOLUTIONS[label]}_{preset}.mp4")
+                start = time.perf_counter()
+                render_video(
+                    frames, output, duration_per_scene=args.seconds, resolution=RESOLUTIONS[label],
+                    preset=preset, threads=args.threads, temp_dir=workdir,
+                )
+                elapsed = time.perf_counter() - start
+                print(f"{label:<16}{preset:<12}{elapsed:>10.2f}{elapsed / video_seconds:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
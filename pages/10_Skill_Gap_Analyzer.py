@@ -1,25 +1,15 @@
 import streamlit as st
-import pandas as pd
-import openai
-from app import log_activity
+from utils.llm import stream_openai_api
+from utils.retrieval import count_tokens
+from utils.skill_analytics import (
+    DEFAULT_TAXONOMY, TARGET_COVERAGE, coverage_matrix, format_taxonomy, parse_taxonomy, plot_coverage_heatmap,
+    rank_gaps, readiness, summarize_for_prompt,
+)
+from utils.skills import detect_schema, encode_skill_matrix, load_skill_aggregate, read_preview, upload_hash
+from utils.activity_log import log_activity
 
 st.set_page_config(page_title="Skill Gap Analyzer", layout="wide")
 
-def query_openai_api(system_prompt, user_prompt, api_key):
-    openai.api_key = api_key
-    try:
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        st.error(f"OpenAI API Request Error: {e}")
-        return None
-
 st.title("🧑‍💻 Skill Gap Analyzer")
 st.info("Analyze employee skills data to identify AI-related training needs.")
 
@@ -30,24 +20,108 @@ if not st.session_state.get('api_key'):
     st.error("Please add your OpenAI API Key to the app's secrets.")
     st.stop()
 
+NOT_PRESENT = "(none)"
+TOP_GAPS = 15
+
 uploaded_file = st.file_uploader("Upload a CSV with employee roles and skills:", type="csv")
 
 if uploaded_file:
-    df = pd.read_csv(uploaded_file)
-    st.write("Data Preview:", df.head())
+    data = uploaded_file.getvalue()
+    file_hash = upload_hash(data)
+    preview = read_preview(file_hash, data)
+    st.write("Data Preview:", preview)
+
+    detected = detect_schema(preview.columns)
+    options = [NOT_PRESENT] + list(preview.columns)
+
+    def column_select(label, field):
+        default = detected.get(field)
+        index = options.index(default) if default in options else 0
+        choice = st.selectbox(label, options, index=index, key=f"skill_gap_{field}")
+        return None if choice == NOT_PRESENT else choice
+
+    with st.expander("Column mapping", expanded=not detected.get("skills")):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            skills_column = column_select("Skills", "skills")
+        with col2:
+            department_column = column_select("Department", "department")
+        with col3:
+            role_column = column_select("Role", "role")
+        with col4:
+            employee_column = column_select("Employee ID", "employee")
+
+    with st.expander("Target AI skills"):
+        taxonomy_text = st.text_area(
+            "One target skill per line, followed by the skill names that count towards it:",
+            value=format_taxonomy(DEFAULT_TAXONOMY),
+            height=250,
+        )
+        target_coverage = st.slider(
+            "Target share of each department holding each skill", 0.1, 1.0, TARGET_COVERAGE, 0.05
+        )
+
+    schema = {
+        "skills": skills_column,
+        "department": department_column,
+        "role": role_column,
+        "employee": employee_column,
+    }
 
     if st.button("Analyze Skill Gaps"):
-        skills_data = df.to_string()
-        with st.spinner("Analyzing skills data..."):
-            system_prompt = "You are an AI HR consultant."
-            user_prompt = f"""
-            Based on the following roles and skills data: {skills_data},
-            1. Identify missing AI-related skills for each department.
-            2. Suggest specific training programs to bridge the gap.
-            3. Create a summary heatmap of department readiness for AI adoption (High, Medium, Low).
-            Present the result in a structured table format.
-            """
-            response = query_openai_api(system_prompt, user_prompt, st.session_state.api_key)
-            if response:
-                st.markdown(response)
-                log_activity(st.session_state.username, "Used Skill Gap Analyzer")
+        try:
+            with st.spinner("Reading employee data..."):
+                headcount, counts = load_skill_aggregate(file_hash, data, schema)
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
+
+        taxonomy = parse_taxonomy(taxonomy_text)
+        if not taxonomy:
+            st.error("Please define at least one target skill.")
+            st.stop()
+
+        coverage = coverage_matrix(headcount, counts, taxonomy)
+        readiness_table = readiness(coverage, headcount, target_coverage)
+        gaps = rank_gaps(coverage, headcount, target_coverage)
+
+        st.subheader("AI Skill Coverage by Department")
+        st.pyplot(plot_coverage_heatmap(coverage))
+
+        col1, col2 = st.columns([2, 3])
+        with col1:
+            st.subheader("Readiness")
+            st.dataframe(readiness_table, use_container_width=True)
+        with col2:
+            st.subheader("Largest Gaps")
+            st.dataframe(
+                gaps.head(TOP_GAPS).style.format({"Coverage": "{:.0%}", "Shortfall": "{:.0%}"}),
+                use_container_width=True,
+            )
+
+        skills_data = encode_skill_matrix(headcount, counts)
+        analytics = summarize_for_prompt(readiness_table, gaps.head(TOP_GAPS))
+        with st.expander("Data sent to the model"):
+            st.caption(
+                f"{int(headcount.sum())} employees summarized into {len(headcount)} groups, "
+                f"~{count_tokens(skills_data) + count_tokens(analytics)} tokens."
+            )
+            st.text(f"{analytics}\n\n{skills_data}")
+
+        st.subheader("Training Recommendations")
+        system_prompt = "You are an AI HR consultant."
+        user_prompt = f"""
+        Readiness tiers and skill gaps have already been computed from the employee data:
+        {analytics}
+
+        For context, each line below is one department and role with its headcount (n)
+        and the share of employees in that group who list each skill:
+        {skills_data}
+
+        Do not recompute or restate the readiness table. For each department, starting
+        with the largest gaps, suggest specific training programs to bridge them, and
+        point out existing skills that make a department a good starting point.
+        """
+        response = st.write_stream(stream_openai_api(system_prompt, user_prompt, st.session_state.api_key))
+        if response:
+            log_activity(st.session_state.username, "Used Skill Gap Analyzer")
@@ -1,24 +1,11 @@
 import streamlit as st
-import openai
-from app import log_activity
+from utils.chat_context import ChatMemory
+from utils.llm import build_messages, stream_openai_messages, submit_chat_completion
+from utils.transcript import render_transcript, trim_transcript
+from utils.activity_log import log_activity
 
 st.set_page_config(page_title="Negotiation & Communication Coach", layout="wide")
 
-def query_openai_api(system_prompt, user_prompt, api_key):
-    openai.api_key = api_key
-    try:
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        st.error(f"OpenAI API Request Error: {e}")
-        return None
-
 st.title("🤝 Negotiation & Communication Coach")
 st.info("Practice your pitching and negotiation skills in a role-play scenario.")
 
@@ -34,14 +21,13 @@ persona_role = st.selectbox("Choose the role for the AI to play:", ["Investor",
 if "coach_messages" not in st.session_state or st.session_state.get("current_coach_persona") != persona_role:
     st.session_state.coach_messages = []
     st.session_state.current_coach_persona = persona_role
+    st.session_state.coach_memory = ChatMemory()
     st.session_state.coach_messages.append({
         "role": "assistant",
         "content": f"Hello. I will be playing the role of a {persona_role}. Please begin your pitch or negotiation."
     })
 
-for message in st.session_state.coach_messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
+render_transcript(st.session_state.coach_messages, st.session_state.coach_memory, st.session_state.username, "coach")
 
 if prompt := st.chat_input("Your pitch/response..."):
     st.session_state.coach_messages.append({"role": "user", "content": prompt})
@@ -49,22 +35,35 @@ if prompt := st.chat_input("Your pitch/response..."):
         st.markdown(prompt)
 
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            # Get the persona's response
-            response_prompt = f"The executive you are talking to just said: \"{prompt}\". Respond realistically to their statement."
-            persona_response = query_openai_api(f"You are playing the role of a {persona_role}.", response_prompt, st.session_state.api_key)
-            st.markdown(persona_response)
-            st.session_state.coach_messages.append({"role": "assistant", "content": persona_response})
+        # Start the feedback request first; it doesn't depend on the persona's reply
+        feedback_prompt = f"""
+        The executive just said: "{prompt}" to a {persona_role}.
+        Provide:
+        1. Feedback on my tone, clarity, and persuasiveness
+        2. Suggestions to improve my communication
+        3. Score out of 10 for effectiveness
+        """
+        feedback_future = submit_chat_completion(
+            build_messages("You are a communication coach.", feedback_prompt), st.session_state.api_key
+        )
+
+        # Stream the persona's response while the feedback is generated
+        persona_prompt = (
+            f"You are playing the role of a {persona_role}. The user is an executive pitching or negotiating with you. "
+            "Respond realistically to their latest statement, staying consistent with the conversation so far."
+        )
+        memory = st.session_state.coach_memory
+        messages = memory.build_messages(persona_prompt, st.session_state.coach_messages)
+        persona_response = st.write_stream(stream_openai_messages(messages, st.session_state.api_key))
+        st.session_state.coach_messages.append({"role": "assistant", "content": persona_response})
+        memory.after_turn(st.session_state.coach_messages, st.session_state.api_key)
+        trim_transcript(st.session_state.coach_messages, memory, st.session_state.username, "coach")
 
-            # Get the feedback
-            feedback_prompt = f"""
-            The executive just said: "{prompt}" to a {persona_role}.
-            Provide:
-            1. Feedback on my tone, clarity, and persuasiveness
-            2. Suggestions to improve my communication
-            3. Score out of 10 for effectiveness
-            """
-            feedback = query_openai_api("You are a communication coach.", feedback_prompt, st.session_state.api_key)
-            with st.expander("Show Feedback on Your Last Message"):
+        with st.expander("Show Feedback on Your Last Message"):
+            try:
+                with st.spinner("Preparing feedback..."):
+                    feedback = feedback_future.result()
                 st.info(feedback)
-            log_activity(st.session_state.username, "Used Negotiation Coach")
+            except Exception as e:
+                st.error(f"OpenAI API Request Error: {e}")
+        log_activity(st.session_state.username, "Used Negotiation Coach")
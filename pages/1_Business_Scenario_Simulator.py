@@ -1,24 +1,14 @@
+import time
+
 import streamlit as st
-import openai
-from app import log_activity
+from utils.llm import stream_openai_api
+from utils.scenario_batch import (
+    MAX_SCENARIOS, comparison_table, expand_template, parse_scenario_list, scenarios_from_csv, submit_batch,
+)
+from utils.activity_log import log_activity
 
 st.set_page_config(page_title="Business Scenario Simulator", layout="wide")
 
-def query_openai_api(system_prompt, user_prompt, api_key):
-    openai.api_key = api_key
-    try:
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        st.error(f"OpenAI API Request Error: {e}")
-        return None
-
 st.title("📈 AI-Powered Business Scenario Simulator")
 st.info("Analyze 'What if' scenarios to understand potential business impact.")
 
@@ -29,11 +19,13 @@ if not st.session_state.get('api_key'):
     st.error("Please add your OpenAI API Key to the app's secrets.")
     st.stop()
 
-scenario = st.text_area("Enter a 'What if' scenario:", height=100, placeholder="What if we cut our marketing budget by 30%?")
+single_tab, batch_tab = st.tabs(["Single scenario", "Batch sweep"])
+
+with single_tab:
+    scenario = st.text_area("Enter a 'What if' scenario:", height=100, placeholder="What if we cut our marketing budget by 30%?")
 
-if st.button("Analyze Scenario"):
-    if scenario:
-        with st.spinner("Simulating scenario..."):
+    if st.button("Analyze Scenario"):
+        if scenario:
             system_prompt = "You are a strategic business advisor."
             user_prompt = f"""
             Analyze the following "What if" scenario: {scenario}.
@@ -44,9 +36,62 @@ if st.button("Analyze Scenario"):
             4. Recommended executive action
             Give the response in a structured format with bullet points.
             """
-            response = query_openai_api(system_prompt, user_prompt, st.session_state.api_key)
+            response = st.write_stream(stream_openai_api(system_prompt, user_prompt, st.session_state.api_key, cache=True))
             if response:
-                st.markdown(response)
                 log_activity(st.session_state.username, "Used Scenario Simulator")
-    else:
-        st.warning("Please enter a scenario.")
+        else:
+            st.warning("Please enter a scenario.")
+
+with batch_tab:
+    source = st.radio("Scenarios from:", ["List", "CSV upload", "Template"], horizontal=True)
+    scenarios = []
+    try:
+        if source == "List":
+            scenarios = parse_scenario_list(st.text_area(
+                "One scenario per line:", height=150,
+                placeholder="What if we cut the EMEA marketing budget by 10%?\nWhat if we cut the EMEA marketing budget by 20%?",
+            ))
+        elif source == "CSV upload":
+            scenario_file = st.file_uploader("CSV with a 'scenario' column:", type="csv")
+            if scenario_file:
+                scenarios = scenarios_from_csv(scenario_file.getvalue())
+        else:
+            template = st.text_input("Template:", value="What if we cut the {region} marketing budget by {cut}%?")
+            variables = st.text_area("Values (one `name: value, value, ...` line per placeholder):",
+                                     value="region: EMEA, APAC, Americas\ncut: 10, 20, 30, 40")
+            scenarios = expand_template(template, variables)
+    except ValueError as e:
+        st.error(str(e))
+
+    if scenarios:
+        st.caption(f"{len(scenarios)} scenarios")
+        with st.expander("Preview scenarios"):
+            st.write(scenarios)
+
+    if st.button("Run Batch"):
+        if not scenarios:
+            st.warning("Please enter at least one scenario.")
+        elif len(scenarios) > MAX_SCENARIOS:
+            st.warning(f"Please run at most {MAX_SCENARIOS} scenarios at a time.")
+        else:
+            progress = []
+            future = submit_batch(scenarios, st.session_state.api_key, progress)
+            progress_bar = st.progress(0.0, text="Analyzing scenarios...")
+            while not future.done():
+                progress_bar.progress(len(progress) / len(scenarios), text=f"Analyzed {len(progress)} of {len(scenarios)} scenarios")
+                time.sleep(0.2)
+            progress_bar.empty()
+            st.session_state.scenario_batch = comparison_table(scenarios, future.result())
+            log_activity(st.session_state.username, "Used Scenario Simulator (batch)", f"{len(scenarios)} scenarios")
+
+    table = st.session_state.get("scenario_batch")
+    if table is not None:
+        if "Error" in table:
+            st.warning(f"{table['Error'].notna().sum()} scenarios failed; see the Error column.")
+        st.dataframe(table, use_container_width=True, hide_index=True)
+        st.download_button(
+            "Download comparison (CSV)",
+            table.to_csv(index=False).encode("utf-8"),
+            file_name="scenario_comparison.csv",
+            mime="text/csv",
+        )
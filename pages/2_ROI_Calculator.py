@@ -1,24 +1,13 @@
 import streamlit as st
-import openai
-from app import log_activity
+from utils.llm import stream_openai_api
+from utils.roi import (
+    UNCERTAIN_INPUTS, evaluate, monte_carlo, parse_ramp, plot_distribution, plot_tornado, summarize_simulation,
+    tornado,
+)
+from utils.activity_log import log_activity
 
 st.set_page_config(page_title="Cost-Benefit & ROI Calculator", layout="wide")
 
-def query_openai_api(system_prompt, user_prompt, api_key):
-    openai.api_key = api_key
-    try:
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        st.error(f"OpenAI API Request Error: {e}")
-        return None
-
 st.title("🧮 AI Cost-Benefit & ROI Calculator")
 st.info("Evaluate the financial viability of a project idea.")
 
@@ -29,25 +18,133 @@ if not st.session_state.get('api_key'):
     st.error("Please add your OpenAI API Key to the app's secrets.")
     st.stop()
 
+# Default uncertainty as (low %, high %) relative to each base input
+DEFAULT_RANGES = {
+    "investment": (-10, 30),
+    "annual_benefit": (-40, 20),
+    "annual_cost": (-10, 40),
+    "adoption": (-40, 10),
+    "discount_rate": (-20, 40),
+}
+
+
+def money(value):
+    if value != value:
+        return "n/a"
+    return f"${value:,.0f}" if value >= 0 else f"-${-value:,.0f}"
+
+
+def percent(value):
+    return "n/a" if value != value else f"{value:.1%}"
+
+
+def years(value):
+    return "not within horizon" if value != value else f"{value:.1f} years"
+
+
 project_idea = st.text_area("Describe the project idea:", height=100, placeholder="Implementing an AI-powered customer support system.")
-investment_amount = st.text_input("Enter the estimated investment amount:", placeholder="$200,000")
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    investment_amount = st.number_input("Upfront investment ($)", min_value=1.0, value=200_000.0, step=10_000.0)
+    horizon = st.slider("Horizon (years)", 1, 10, 5)
+with col2:
+    annual_benefit = st.number_input("Annual benefit at full adoption ($)", min_value=0.0, value=150_000.0, step=10_000.0)
+    discount_rate = st.number_input("Discount rate (%)", min_value=0.0, max_value=100.0, value=10.0, step=0.5) / 100
+with col3:
+    annual_cost = st.number_input("Annual running cost ($)", min_value=0.0, value=30_000.0, step=5_000.0)
+    ramp_text = st.text_input("Adoption ramp (% of full benefit per year)", value="40, 80, 100")
+
+with st.expander("Uncertainty ranges (% relative to the base value)"):
+    range_pct = {}
+    for name, label in UNCERTAIN_INPUTS.items():
+        low_default, high_default = DEFAULT_RANGES[name]
+        col_label, col_low, col_high = st.columns([2, 1, 1])
+        col_label.markdown(f"**{label}**")
+        low_pct = col_low.number_input("Low %", value=float(low_default), step=5.0, key=f"roi_low_{name}")
+        high_pct = col_high.number_input("High %", value=float(high_default), step=5.0, key=f"roi_high_{name}")
+        range_pct[name] = (low_pct, high_pct)
 
 if st.button("Calculate ROI"):
-    if project_idea and investment_amount:
-        with st.spinner("Analyzing project..."):
-            system_prompt = "You are a financial strategist."
-            user_prompt = f"""
-            Evaluate the project idea: {project_idea} with an investment of {investment_amount}.
-            Provide:
-            1. Estimated ROI (%)
-            2. Payback period
-            3. Key risks
-            4. Alternative approaches
-            Explain in simple terms suitable for an executive boardroom presentation.
-            """
-            response = query_openai_api(system_prompt, user_prompt, st.session_state.api_key)
-            if response:
-                st.markdown(response)
-                log_activity(st.session_state.username, "Used ROI Calculator")
-    else:
-        st.warning("Please fill in both fields.")
+    if not project_idea:
+        st.warning("Please describe the project idea.")
+        st.stop()
+    try:
+        ramp = parse_ramp(ramp_text)
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+
+    inputs = {
+        "investment": investment_amount,
+        "annual_benefit": annual_benefit,
+        "annual_cost": annual_cost,
+        "adoption": 1.0,
+        "discount_rate": discount_rate,
+        "years": horizon,
+        "ramp": ramp,
+    }
+    ranges = {
+        name: (inputs[name] * (1 + low / 100), inputs[name] * (1 + high / 100))
+        for name, (low, high) in range_pct.items()
+    }
+
+    base = evaluate(inputs)
+    simulation = monte_carlo(inputs, ranges)
+    percentiles, probability = summarize_simulation(simulation)
+    sensitivity = tornado(inputs, ranges)
+
+    st.subheader("Base Case")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("NPV", money(base["npv"][0]))
+    col2.metric("IRR", percent(base["irr"][0]))
+    col3.metric("Payback", years(base["payback"][0]))
+    col4.metric(f"ROI over {horizon} years", percent(base["roi"][0]))
+
+    st.subheader(f"Monte Carlo ({len(simulation['npv']):,} draws)")
+    col1, col2 = st.columns(2)
+    col1.metric("Probability of positive NPV", f"{probability['npv_positive']:.0%}")
+    col2.metric("Probability of payback within horizon", f"{probability['pays_back']:.0%}")
+    st.pyplot(plot_distribution(simulation["npv"]))
+    st.dataframe(
+        percentiles.style.format({
+            "NPV": money, "IRR": percent, "Payback (years)": "{:.1f}", "ROI": percent,
+        }),
+        use_container_width=True,
+    )
+
+    st.subheader("Sensitivity")
+    st.pyplot(plot_tornado(sensitivity))
+
+    sensitivity_lines = "\n".join(
+        f"- {row['Input']}: NPV {money(row['NPV at low'])} to {money(row['NPV at high'])}"
+        for _, row in sensitivity.iterrows()
+    )
+    results = f"""
+Base case: NPV {money(base['npv'][0])}, IRR {percent(base['irr'][0])}, payback {years(base['payback'][0])},
+ROI over {horizon} years {percent(base['roi'][0])}.
+Inputs: investment {money(investment_amount)}, annual benefit at full adoption {money(annual_benefit)},
+annual running cost {money(annual_cost)}, discount rate {discount_rate:.1%},
+adoption ramp {', '.join(f'{r:.0%}' for r in ramp)}.
+Monte Carlo: probability of positive NPV {probability['npv_positive']:.0%}, NPV P5 {money(percentiles.loc['P5', 'NPV'])},
+P50 {money(percentiles.loc['P50', 'NPV'])}, P95 {money(percentiles.loc['P95', 'NPV'])}.
+Sensitivity of NPV to each input over its range, largest first:
+{sensitivity_lines}
+"""
+
+    st.subheader("Boardroom Summary")
+    system_prompt = "You are a financial strategist."
+    user_prompt = f"""
+    The following financial results were computed for the project idea: {project_idea}
+    {results}
+    Use these figures exactly as given; do not recalculate or invent other numbers.
+    Provide:
+    1. A short verdict on financial viability
+    2. What drives the result, based on the sensitivity analysis
+    3. Key risks
+    4. Alternative approaches
+    Explain in simple terms suitable for an executive boardroom presentation.
+    """
+    response = st.write_stream(stream_openai_api(system_prompt, user_prompt, st.session_state.api_key, cache=True))
+    if response:
+        log_activity(st.session_state.username, "Used ROI Calculator")
@@ -1,110 +1,156 @@
 import streamlit as st
-from gtts import gTTS
-import openai
-import re
 import io
 import base64
-import json
-from moviepy.editor import ImageClip, concatenate_videoclips, AudioFileClip
+import os
+import tempfile
+import numpy as np
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from PIL import Image
-from app import log_activity
+from utils.llm import build_messages, get_client, with_retries
+from utils.structured import STORYBOARD_SCENE, generate_items
+from utils.tts import iter_segments, join_mp3
+from utils.video_render import DEFAULT_PRESET, DEFAULT_RESOLUTION, ENCODER_PRESETS, RESOLUTIONS, render_video
+from utils.activity_log import log_activity
 
 st.set_page_config(page_title="Text-to-Video Generator", layout="wide")
 
-def query_openai_text_api(system_prompt, user_prompt, api_key):
-    openai.api_key = api_key
-    try:
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        st.error(f"OpenAI Text API Error: {e}")
-    return None
+# Bounded so a long storyboard doesn't trip the image API's rate limit
+IMAGE_CONCURRENCY = 4
+SCENE_ATTEMPTS = 2
 
 def generate_image_with_openai(prompt, api_key):
-    openai.api_key = api_key
-    try:
-        response = openai.images.generate(
-            model="dall-e-3",
-            prompt=prompt,
-            n=1,
-            size="1024x1024",
-            response_format="b64_json"
-        )
-        return response.data[0].b64_json
-    except Exception as e:
-        st.error(f"OpenAI Image Generation Error: {e}")
-    return None
+    response = with_retries(
+        get_client(api_key).images.generate,
+        model="dall-e-3",
+        prompt=prompt,
+        n=1,
+        size="1024x1024",
+        response_format="b64_json"
+    )
+    return response.data[0].b64_json
+
+def generate_scene_image(prompt, api_key, attempts=SCENE_ATTEMPTS):
+    # Transient API errors are already retried by the client; this also retries
+    # one-off failures such as an empty or rejected generation
+    for attempt in range(attempts):
+        try:
+            return generate_image_with_openai(prompt, api_key)
+        except Exception as e:
+            last_error = e
+    raise last_error
+
+def synthesize_narration(text, path, first_segment=None):
+    """
+    Writes the narration MP3 to path. If given, first_segment (a Future) is
+    resolved with the first sentence's audio as soon as it is ready.
+    """
+    segments = []
+    for segment in iter_segments(text, lang='en'):
+        if first_segment is not None and not segments:
+            first_segment.set_result(segment)
+        segments.append(segment)
+    with open(path, 'wb') as f:
+        f.write(join_mp3(segments))
+    return path
 
 def generate_storyboard(script, api_key):
     system_prompt = "You are a creative video director."
     user_prompt = f"""
     Based on the following script, create a storyboard with 4-6 scenes.
-    For each scene, provide a 'visual_description' for an AI image generator (detailed, cinematic, vivid) and a 'narration' script.
-    Return as a valid JSON list of dictionaries. Example:
-    [
-      {{"scene": 1, "visual_description": "A panoramic view of a modern city skyline at sunrise...", "narration": "In a world of constant change..."}}
-    ]
+    For each scene, provide its 'scene' number, a 'visual_description' for an AI image generator
+    (detailed, cinematic, vivid) and a 'narration' script.
     SCRIPT: --- {script} ---
     """
-    response_text = query_openai_text_api(system_prompt, user_prompt, api_key)
-    if response_text:
-        try:
-            json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
-            return json.loads(json_match.group(0))
-        except (AttributeError, json.JSONDecodeError):
-            st.error("Failed to parse storyboard.")
-    return None
-
-def create_video_from_storyboard(storyboard, api_key):
-    clips = []
-    full_narration = " ".join([scene.get('narration', '') for scene in storyboard])
+    try:
+        scenes = generate_items(STORYBOARD_SCENE, build_messages(system_prompt, user_prompt), 6, api_key, min_count=4)
+    except Exception as e:
+        st.error(f"Failed to generate storyboard: {e}")
+        return None
+    for number, scene in enumerate(scenes, start=1):
+        scene['scene'] = number
+    return scenes
 
-    with st.spinner("Generating full audio narration..."):
-        tts = gTTS(text=full_narration, lang='en')
-        audio_filename = "full_narration.mp3"
-        tts.save(audio_filename)
-        main_audio = AudioFileClip(audio_filename)
-        total_duration = main_audio.duration
-
-    duration_per_scene = total_duration / len(storyboard)
-
-    image_files = []
-    for i, scene in enumerate(storyboard):
-        status_placeholder = st.empty()
-        status_placeholder.info(f"🎨 Generating image for scene {i+1}/{len(storyboard)}...")
-        b64_json = generate_image_with_openai(scene['visual_description'], api_key)
-        if b64_json:
-            img_bytes = base64.b64decode(b64_json)
-            img = Image.open(io.BytesIO(img_bytes))
-            img_path = f"scene_{i+1}.png"
-            img.save(img_path)
-            image_files.append(img_path)
-            status_placeholder.empty()
-        else:
-            st.error(f"Could not generate image for scene {i+1}. Skipping.")
-            continue
+def generate_scene_assets(storyboard, api_key, audio_filename):
+    """
+    Generates the narration and every scene image at the same time, reporting
+    progress as each scene finishes. Failed scenes are skipped.
+    """
+    full_narration = " ".join([scene.get('narration', '') for scene in storyboard])
+    scene_images = {}
+
+    with ThreadPoolExecutor(max_workers=1) as tts_pool, ThreadPoolExecutor(max_workers=IMAGE_CONCURRENCY) as image_pool:
+        first_segment = Future()
+        narration_future = tts_pool.submit(synthesize_narration, full_narration, audio_filename, first_segment)
+        futures = {
+            image_pool.submit(generate_scene_image, scene['visual_description'], api_key): i
+            for i, scene in enumerate(storyboard)
+        }
+
+        preview = st.empty()
+        progress = st.progress(0.0, text=f"🎨 Generating images for {len(storyboard)} scenes...")
+        pending = set(futures)
+        waiting_for_preview = True
+        while pending:
+            waitset = pending | ({first_segment, narration_future} if waiting_for_preview else set())
+            done, _ = wait(waitset, return_when=FIRST_COMPLETED)
+
+            if waiting_for_preview and (first_segment.done() or narration_future.done()):
+                waiting_for_preview = False
+                if first_segment.done():
+                    # Let the user hear the narration voice while the scenes render
+                    with preview.container():
+                        st.caption("🔊 Narration preview")
+                        st.audio(first_segment.result(), format='audio/mp3')
+
+            for future in done & pending:
+                pending.remove(future)
+                i = futures[future]
+                try:
+                    scene_images[i] = future.result()
+                except Exception as e:
+                    st.error(f"Could not generate image for scene {i+1}: {e}. Skipping.")
+                finished = len(futures) - len(pending)
+                progress.progress(finished / len(futures), text=f"🎨 {finished}/{len(futures)} scenes done")
+
+        with st.spinner("Finishing audio narration..."):
+            narration_future.result()
+        progress.empty()
+
+    return [scene_images[i] for i in sorted(scene_images)]
+
+def decode_frame(b64_json):
+    """
+    Decodes a base64 image straight into an RGB numpy array for moviepy.
+    """
+    img = Image.open(io.BytesIO(base64.b64decode(b64_json)))
+    return np.asarray(img.convert("RGB"))
 
-    with st.spinner("🎬 Compiling video... this may take a moment."):
-        for img_path in image_files:
-            clip = ImageClip(img_path).set_duration(duration_per_scene)
-            clip = clip.resize(lambda t: 1 + 0.05 * t).set_pos(('center', 'center'))
-            clips.append(clip)
+def create_video_from_storyboard(storyboard, api_key, workdir, resolution, preset):
+    """
+    Renders the storyboard into workdir and returns the MP4 path. Every render
+    gets its own directory, so concurrent users never share file names.
+    """
+    audio_filename = os.path.join(workdir, "full_narration.mp3")
 
-        if not clips:
-            st.error("No video clips were created. Aborting.")
-            return None
+    try:
+        scene_images = generate_scene_assets(storyboard, api_key, audio_filename)
+    except Exception as e:
+        st.error(f"Failed to generate audio narration: {e}")
+        return None
 
-        video = concatenate_videoclips(clips, method="compose")
-        video = video.set_audio(main_audio)
+    if not scene_images:
+        st.error("No video clips were created. Aborting.")
+        return None
 
-        video_filename = "generated_video.mp4"
-        video.write_videofile(video_filename, fps=24, codec='libx264', audio_codec='aac')
+    with st.spinner("🎬 Compiling video... this may take a moment."):
+        video_filename = os.path.join(workdir, "generated_video.mp4")
+        render_video(
+            [decode_frame(b64_json) for b64_json in scene_images],
+            video_filename,
+            audio_path=audio_filename,
+            resolution=resolution,
+            preset=preset,
+        )
 
     return video_filename
 
@@ -120,17 +166,29 @@ if not st.session_state.get('api_key'):
 
 script = st.text_area("Enter your video script here:", height=200)
 
+with st.expander("Render settings"):
+    resolution_label = st.selectbox("Output resolution:", list(RESOLUTIONS), index=list(RESOLUTIONS).index(DEFAULT_RESOLUTION))
+    preset = st.selectbox("Encoder preset (faster renders, larger files):", ENCODER_PRESETS, index=ENCODER_PRESETS.index(DEFAULT_PRESET))
+
 if st.button("Generate Video"):
     if script:
         storyboard = generate_storyboard(script, st.session_state.api_key)
         if storyboard:
-            video_file = create_video_from_storyboard(storyboard, st.session_state.api_key)
-            if video_file:
-                st.success("Video generated successfully!")
-                log_activity(st.session_state.username, "Generated Video")
-
-                video_bytes = open(video_file, 'rb').read()
-                st.video(video_bytes)
-                st.download_button("Download Video (MP4)", video_bytes, "ai_generated_video.mp4", "video/mp4")
+            with tempfile.TemporaryDirectory(prefix="video_render_") as workdir:
+                video_file = create_video_from_storyboard(
+                    storyboard, st.session_state.api_key, workdir, RESOLUTIONS[resolution_label], preset
+                )
+                if video_file:
+                    st.success("Video generated successfully!")
+                    log_activity(st.session_state.username, "Generated Video")
+
+                    # Streamlit's media storage keeps every video and download as
+                    # in-memory bytes (paths and file handles are read in full), so
+                    # read the MP4 once, before the render directory goes away, and
+                    # share that one buffer between both widgets
+                    with open(video_file, 'rb') as f:
+                        video_bytes = f.read()
+                    st.video(video_bytes, format="video/mp4")
+                    st.download_button("Download Video (MP4)", video_bytes, "ai_generated_video.mp4", "video/mp4")
     else:
         st.warning("Please enter a script.")
@@ -1,34 +1,13 @@
 import streamlit as st
-from PyPDF2 import PdfReader
-import openai
-from app import log_activity
+from utils.document_store import document_hash, ensure_index, get_document_index, has_index
+from utils.llm import stream_openai_api
+from utils.retrieval import TOP_K
+from utils.activity_log import log_activity
 
-st.set_page_config(page_title="AI Compliance & Ethics Checker", layout="wide")
+st.set_page_config(page_title="AI Document Q&A", layout="wide")
 
-def query_openai_api(system_prompt, user_prompt, api_key):
-    openai.api_key = api_key
-    try:
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        st.error(f"OpenAI API Request Error: {e}")
-        return None
-
-def extract_text(uploaded_file):
-    if uploaded_file.type == "application/pdf":
-        reader = PdfReader(uploaded_file)
-        return "".join(page.extract_text() for page in reader.pages if page.extract_text())
-    else:
-        return uploaded_file.getvalue().decode("utf-8")
-
-st.title("📌 AI Compliance & Ethics Checker")
-st.info("Review your AI policy drafts against key ethical and regulatory principles.")
+st.title("📄 AI Document Q&A")
+st.info("Upload a document and ask questions about it. Only the most relevant passages are sent to the AI.")
 
 if 'username' not in st.session_state or not st.session_state.username:
     st.warning("Please log in on the main page.")
@@ -37,29 +16,53 @@ if not st.session_state.get('api_key'):
     st.error("Please add your OpenAI API Key to the app's secrets.")
     st.stop()
 
-uploaded_file = st.file_uploader("Upload your AI policy draft (PDF or TXT):", type=["pdf", "txt"])
+uploaded_file = st.file_uploader("Upload a document (PDF or TXT):", type=["pdf", "txt"])
 
 if uploaded_file:
-    policy_text = extract_text(uploaded_file)
+    data = uploaded_file.getvalue()
+    doc_hash = document_hash(data)
+    try:
+        if not has_index(doc_hash):
+            progress = st.progress(0.0, text="Reading and indexing document...")
+            ensure_index(
+                doc_hash, data, uploaded_file.type, st.session_state.api_key,
+                on_progress=lambda done, total: progress.progress(done / total, text=f"Reading page {done}/{total}...")
+            )
+            progress.empty()
+        doc_index = get_document_index(doc_hash, data, uploaded_file.type, st.session_state.api_key)
+    except Exception as e:
+        st.error(f"Failed to index document: {e}")
+        st.stop()
+
+    st.success(f"Indexed '{uploaded_file.name}' into {len(doc_index.chunks)} passages.")
+
+    question = st.text_input("Ask a question about the document:")
 
-    if st.button("Review Policy"):
-        with st.spinner("Reviewing policy..."):
-            system_prompt = "You are an AI Ethics Officer."
+    if st.button("Get Answer"):
+        if question:
+            try:
+                matches = doc_index.search(question, st.session_state.api_key, k=TOP_K)
+            except Exception as e:
+                st.error(f"Failed to search document: {e}")
+                st.stop()
+
+            context = "\n\n---\n\n".join(chunk for _, chunk in matches)
+            system_prompt = "You are a helpful analyst who answers questions using only the provided document excerpts."
             user_prompt = f"""
-            Review the following company AI policy draft: {policy_text}.
-            Check it against the principles of:
-            - Fairness
-            - Transparency
-            - GDPR compliance
-            - EU AI Act guidelines
+            Answer the question using the document excerpts below.
+            If the excerpts do not contain the answer, say so.
+
+            EXCERPTS:
+            {context}
 
-            Provide:
-            1. Strengths of this policy
-            2. Weaknesses or risks
-            3. Recommendations to improve
-            Use clear and concise business language.
+            QUESTION: {question}
             """
-            response = query_openai_api(system_prompt, user_prompt, st.session_state.api_key)
+            response = st.write_stream(stream_openai_api(system_prompt, user_prompt, st.session_state.api_key, cache=True))
             if response:
-                st.markdown(response)
-                log_activity(st.session_state.username, "Used Compliance Checker")
+                with st.expander("Sources"):
+                    for score, chunk in matches:
+                        st.caption(f"Relevance: {score:.2f}")
+                        st.text(chunk)
+                log_activity(st.session_state.username, "Used Document Q&A", question)
+        else:
+            st.warning("Please enter a question.")
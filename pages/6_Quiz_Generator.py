@@ -1,45 +1,24 @@
 import streamlit as st
-import openai
-import json
-import re
-import time
-from app import log_activity
+from utils.quiz_bank import start_quiz
+from utils.activity_log import log_activity
 
 st.set_page_config(page_title="Quiz Generator", layout="wide")
 
-def query_openai_api(system_prompt, user_prompt, api_key):
-    openai.api_key = api_key
-    try:
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        st.error(f"OpenAI API Error: {e}")
-    return None
-
-def generate_quiz(topic, num_questions, api_key):
-    system_prompt = "You are an expert quiz designer."
-    user_prompt = f"""
-    Generate {num_questions} multiple-choice questions on '{topic}'.
-    For each, provide: 'question', a list of 'options', the 'correct_answer', and a brief 'explanation'.
-    Return as a valid JSON list of dictionaries. Example:
-    [
-        {{"question": "...", "options": ["A", "B", "C"], "correct_answer": "B", "explanation": "..."}}
-    ]
-    """
-    response_text = query_openai_api(system_prompt, user_prompt, api_key)
-    if response_text:
-        try:
-            json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
-            return json.loads(json_match.group(0))
-        except (AttributeError, json.JSONDecodeError):
-            st.error("Failed to parse quiz.")
-    return None
+QUESTION_WAIT_SECONDS = 15
+
+
+def reset_quiz():
+    for key in ("quiz_questions", "quiz_job", "quiz_total", "quiz_answer", "quiz_logged"):
+        st.session_state.pop(key, None)
+
+
+def available_questions():
+    questions = list(st.session_state.quiz_questions)
+    job = st.session_state.get("quiz_job")
+    if job is not None:
+        questions += job.questions
+    return questions
+
 
 st.title("🧠 Quiz Generator")
 st.info("Generate a quiz from any topic.")
@@ -56,45 +35,72 @@ num_questions = st.slider("Number of questions:", 1, 10, 5)
 
 if st.button("Generate Quiz"):
     if topic:
-        with st.spinner("Generating quiz..."):
-            quiz_questions = generate_quiz(topic, num_questions, st.session_state.api_key)
-            if quiz_questions:
-                st.session_state.quiz_questions = quiz_questions
-                st.session_state.current_quiz_question = 0
-                st.session_state.quiz_score = 0
-                log_activity(st.session_state.username, "Generated Quiz", topic)
-                st.rerun()
+        reset_quiz()
+        questions, job = start_quiz(topic, num_questions, st.session_state.api_key)
+        st.session_state.quiz_questions = questions
+        st.session_state.quiz_job = job
+        st.session_state.quiz_total = num_questions
+        st.session_state.current_quiz_question = 0
+        st.session_state.quiz_score = 0
+        log_activity(st.session_state.username, "Generated Quiz", topic)
+        st.rerun()
     else:
         st.warning("Please enter a topic.")
 
 if 'quiz_questions' in st.session_state:
     q_index = st.session_state.current_quiz_question
-    questions = st.session_state.quiz_questions
+    job = st.session_state.get("quiz_job")
+    questions = available_questions()
+    total = st.session_state.quiz_total if job is None or not job.done else len(questions)
+
+    if q_index >= len(questions) and q_index < total:
+        # The next question is still being generated
+        with st.spinner("Generating the next question..."):
+            job.wait_for(q_index + 1, timeout=QUESTION_WAIT_SECONDS)
+        st.rerun()
+
+    if job is not None and job.done and job.error and len(questions) < st.session_state.quiz_total:
+        if not questions:
+            st.error(f"Failed to generate quiz: {job.error}")
+            reset_quiz()
+            st.stop()
+        st.warning(f"Only {len(questions)} of {st.session_state.quiz_total} questions could be generated.")
 
     if q_index < len(questions):
         question = questions[q_index]
-        st.subheader(f"Question {q_index + 1}/{len(questions)}")
+        answer = st.session_state.get("quiz_answer")
+        st.subheader(f"Question {q_index + 1}/{total}")
         st.write(question['question'])
 
-        user_answer = st.radio("Choose your answer:", options=question['options'], index=None, key=f"q_{q_index}")
+        user_answer = st.radio("Choose your answer:", options=question['options'], index=None, key=f"q_{q_index}",
+                               disabled=answer is not None)
 
-        if st.button("Submit Answer", key=f"submit_{q_index}"):
-            if user_answer:
-                if user_answer == question['correct_answer']:
-                    st.success("Correct!")
-                    st.session_state.quiz_score += 1
+        if answer is None:
+            if st.button("Submit Answer", key=f"submit_{q_index}"):
+                if user_answer:
+                    correct = user_answer == question['correct_answer']
+                    if correct:
+                        st.session_state.quiz_score += 1
+                    st.session_state.quiz_answer = {"correct": correct}
+                    st.rerun()
                 else:
-                    st.error("Incorrect.")
-
-                st.info(f"**Explanation:** {question['explanation']}")
+                    st.warning("Please select an answer.")
+        else:
+            if answer["correct"]:
+                st.success("Correct!")
+            else:
+                st.error(f"Incorrect. The correct answer is: {question['correct_answer']}")
+            st.info(f"**Explanation:** {question['explanation']}")
+            last = q_index + 1 >= total
+            if st.button("See Results" if last else "Next Question", key=f"next_{q_index}"):
                 st.session_state.current_quiz_question += 1
-                time.sleep(3)
+                st.session_state.quiz_answer = None
                 st.rerun()
-            else:
-                st.warning("Please select an answer.")
     else:
         st.success(f"Quiz Complete! Score: {st.session_state.quiz_score}/{len(questions)}")
-        log_activity(st.session_state.username, "Completed Quiz", f"Score: {st.session_state.quiz_score}/{len(questions)}")
+        if not st.session_state.get("quiz_logged"):
+            log_activity(st.session_state.username, "Completed Quiz", f"Score: {st.session_state.quiz_score}/{len(questions)}")
+            st.session_state.quiz_logged = True
         if st.button("Take Another Quiz"):
-            del st.session_state.quiz_questions
+            reset_quiz()
             st.rerun()
@@ -1,21 +1,9 @@
 import streamlit as st
-from gtts import gTTS
-import io
-from app import log_activity
+from utils.tts import iter_segments, join_mp3, split_sentences
+from utils.activity_log import log_activity
 
 st.set_page_config(page_title="AI Voice Narrator", layout="wide")
 
-def generate_audio(text):
-    try:
-        tts = gTTS(text=text, lang='en')
-        fp = io.BytesIO()
-        tts.write_to_fp(fp)
-        fp.seek(0)
-        return fp.read()
-    except Exception as e:
-        st.error(f"Failed to generate audio: {e}")
-        return None
-
 st.title("🔊 AI Voice Narrator")
 st.info("Convert any text into a realistic voice narration.")
 
@@ -27,12 +15,28 @@ text_to_narrate = st.text_area("Enter text to narrate:", height=250)
 
 if st.button("Generate Audio"):
     if text_to_narrate:
-        with st.spinner("Generating audio..."):
-            audio_bytes = generate_audio(text_to_narrate)
-            if audio_bytes:
-                st.success("Audio generated!")
-                st.audio(audio_bytes, format='audio/mp3')
-                st.download_button("Download Audio (MP3)", audio_bytes, "narration.mp3", "audio/mp3")
-                log_activity(st.session_state.username, "Generated Voice Narration")
+        first_segment_player = st.empty()
+        progress = st.progress(0.0, text="Generating audio...")
+        segments = []
+        try:
+            total = len(split_sentences(text_to_narrate))
+            for segment in iter_segments(text_to_narrate, lang='en'):
+                if not segments:
+                    # Start playing the first sentence while the rest is synthesized
+                    first_segment_player.audio(segment, format='audio/mp3', autoplay=True)
+                segments.append(segment)
+                progress.progress(len(segments) / total, text=f"Generated {len(segments)}/{total} sentences...")
+        except Exception as e:
+            st.error(f"Failed to generate audio: {e}")
+            segments = []
+        progress.empty()
+
+        if segments:
+            audio_bytes = join_mp3(segments)
+            st.success("Audio generated!")
+            st.caption("Full narration")
+            st.audio(audio_bytes, format='audio/mp3')
+            st.download_button("Download Audio (MP3)", audio_bytes, "narration.mp3", "audio/mp3")
+            log_activity(st.session_state.username, "Generated Voice Narration")
     else:
         st.warning("Please enter text to narrate.")
@@ -1,24 +1,11 @@
 import streamlit as st
-import openai
-from app import log_activity
+from utils.chat_context import ChatMemory
+from utils.llm import stream_openai_messages
+from utils.transcript import render_transcript, trim_transcript
+from utils.activity_log import log_activity
 
 st.set_page_config(page_title="AI Mentor Chatbot", layout="wide")
 
-def query_openai_api(system_prompt, user_prompt, api_key):
-    openai.api_key = api_key
-    try:
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        st.error(f"OpenAI API Error: {e}")
-    return None
-
 st.title("💬 AI Mentor Chatbot")
 st.info("Get advice from different AI executive personas.")
 
@@ -34,14 +21,13 @@ persona = st.selectbox("Choose a persona:", ["CEO", "Data Scientist", "HR Head"]
 if "mentor_messages" not in st.session_state or st.session_state.get("current_persona") != persona:
     st.session_state.mentor_messages = []
     st.session_state.current_persona = persona
+    st.session_state.mentor_memory = ChatMemory()
     st.session_state.mentor_messages.append({
         "role": "assistant",
         "content": f"Hello! I am your AI Mentor, speaking as a {persona}. How can I help?"
     })
 
-for message in st.session_state.mentor_messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
+render_transcript(st.session_state.mentor_messages, st.session_state.mentor_memory, st.session_state.username, "mentor")
 
 if prompt := st.chat_input("Ask for advice..."):
     st.session_state.mentor_messages.append({"role": "user", "content": prompt})
@@ -49,14 +35,16 @@ if prompt := st.chat_input("Ask for advice..."):
         st.markdown(prompt)
 
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            system_prompt = f"""
-            You are an AI Mentor for executives. Your persona is a {persona}.
-            - As a CEO, focus on strategy, vision, and business impact.
-            - As a Data Scientist, focus on technology, data, and implementation.
-            - As an HR Head, focus on people, skills, and organizational change.
-            """
-            response = query_openai_api(system_prompt, prompt, st.session_state.api_key)
-            st.markdown(response)
-            st.session_state.mentor_messages.append({"role": "assistant", "content": response})
-            log_activity(st.session_state.username, "Used AI Mentor", f"Persona: {persona}")
+        system_prompt = f"""
+        You are an AI Mentor for executives. Your persona is a {persona}.
+        - As a CEO, focus on strategy, vision, and business impact.
+        - As a Data Scientist, focus on technology, data, and implementation.
+        - As an HR Head, focus on people, skills, and organizational change.
+        """
+        memory = st.session_state.mentor_memory
+        messages = memory.build_messages(system_prompt, st.session_state.mentor_messages)
+        response = st.write_stream(stream_openai_messages(messages, st.session_state.api_key))
+        st.session_state.mentor_messages.append({"role": "assistant", "content": response})
+        memory.after_turn(st.session_state.mentor_messages, st.session_state.api_key)
+        trim_transcript(st.session_state.mentor_messages, memory, st.session_state.username, "mentor")
+        log_activity(st.session_state.username, "Used AI Mentor", f"Persona: {persona}")
@@ -1,7 +1,10 @@
 import streamlit as st
-import openai
-from PyPDF2 import PdfReader
 import os
+from utils.document_store import document_hash, ensure_text, get_document_text, has_text
+from utils.compliance_review import (
+    SYSTEM_PROMPT, build_merge_prompt, build_review_prompt, needs_map_reduce, review_sections, split_sections
+)
+from utils.llm import stream_openai_api
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -10,36 +13,23 @@ st.set_page_config(
     layout="wide"
 )
 
-# --- Function to Query OpenAI API ---
-def query_openai_api(system_prompt, user_prompt, api_key):
-    """
-    Sends a prompt to the OpenAI API and returns the response.
-    """
-    openai.api_key = api_key
-    try:
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        st.error(f"An error occurred with the OpenAI API request: {e}")
-        return None
-
 # --- Function to Extract Text from Uploaded File ---
 def extract_text(uploaded_file):
     """
     Extracts text from an uploaded PDF or TXT file.
     """
     try:
-        if uploaded_file.type == "application/pdf":
-            reader = PdfReader(uploaded_file)
-            return "".join(page.extract_text() for page in reader.pages if page.extract_text())
-        else: # Assumes text file
-            return uploaded_file.getvalue().decode("utf-8")
+        # Cached by content hash, so reruns and re-uploads skip the parse
+        data = uploaded_file.getvalue()
+        doc_hash = document_hash(data)
+        if not has_text(doc_hash):
+            progress = st.progress(0.0, text="Reading document...")
+            ensure_text(
+                doc_hash, data, uploaded_file.type,
+                on_progress=lambda done, total: progress.progress(done / total, text=f"Reading page {done}/{total}...")
+            )
+            progress.empty()
+        return get_document_text(doc_hash, data, uploaded_file.type)
     except Exception as e:
         st.error(f"An error occurred while reading the file: {e}")
         return None
@@ -67,8 +57,7 @@ uploaded_file = st.file_uploader(
 
 if uploaded_file:
     # Extract text from the uploaded document
-    with st.spinner("Processing document..."):
-        policy_text = extract_text(uploaded_file)
+    policy_text = extract_text(uploaded_file)
     
     if policy_text:
         st.success(f"Successfully processed '{uploaded_file.name}'.")
@@ -79,41 +68,24 @@ if uploaded_file:
 
         # Button to trigger the review
         if st.button("Review Policy"):
-            with st.spinner("Reviewing policy with AI Ethics Officer... This may take a moment."):
-                system_prompt = "You are an expert AI Ethics Officer."
-                user_prompt = f"""
-                Please review the following company AI policy draft.
-                
-                Check it thoroughly against the principles of:
-                - **Fairness:** Does the policy address potential biases in AI models and data?
-                - **Transparency:** Does it explain how AI decisions are made and when AI is being used?
-                - **GDPR Compliance:** Does it align with data protection, consent, and user rights under GDPR?
-                - **EU AI Act Guidelines:** Does it consider risk classification and requirements for high-risk AI systems as outlined in the EU AI Act?
-
-                Provide your analysis in the following structured format:
-                
-                ### 1. Strengths of this Policy
-                * (List the positive aspects and well-addressed points here)
-                
-                ### 2. Weaknesses & Potential Risks
-                * (List the gaps, ambiguities, or areas that pose a compliance or ethical risk)
-                
-                ### 3. Actionable Recommendations
-                * (Provide clear, specific suggestions to improve the policy and mitigate risks)
-                
-                Use clear and concise business language suitable for an executive audience.
-                
-                ---
-                **POLICY DRAFT:**
-                {policy_text}
-                ---
-                """
-                
-                # Get the response from OpenAI
-                response = query_openai_api(system_prompt, user_prompt, api_key)
-                
-                if response:
-                    st.markdown("---")
-                    st.subheader("AI Ethics Officer Review")
-                    st.markdown(response)
+            if needs_map_reduce(policy_text):
+                # Long policy: review sections in parallel, then merge the findings
+                sections = split_sections(policy_text)
+                progress = st.progress(0.0, text=f"Reviewing {len(sections)} policy sections...")
+                try:
+                    section_findings = review_sections(
+                        sections, api_key,
+                        on_progress=lambda done, total: progress.progress(done / total, text=f"Reviewed {done}/{total} sections...")
+                    )
+                except Exception as e:
+                    st.error(f"An error occurred with the OpenAI API request: {e}")
+                    st.stop()
+                progress.empty()
+                user_prompt = build_merge_prompt(section_findings)
+            else:
+                user_prompt = build_review_prompt(policy_text)
 
+            # Stream the response from OpenAI
+            st.markdown("---")
+            st.subheader("AI Ethics Officer Review")
+            st.write_stream(stream_openai_api(SYSTEM_PROMPT, user_prompt, api_key, cache=True))
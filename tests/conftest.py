@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """
+    Runs the test from an empty directory, so everything written under
+    user_data/ lands in tmp_path.
+    """
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / "user_data"
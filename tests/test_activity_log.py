@@ -0,0 +1,103 @@
+import csv
+import sqlite3
+import threading
+
+import pytest
+
+from utils.activity_log import FIELDS, ActivityLogger, CSVAppendBackend, SQLiteBackend
+from utils.paths import get_user_data_file
+
+
+def read_csv(username):
+    with open(get_user_data_file(username, "analytics"), newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def read_sqlite(backend):
+    conn = sqlite3.connect(backend.path)
+    try:
+        return conn.execute("SELECT username, activity, details FROM activity ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_csv_backend_appends_with_one_header(data_dir):
+    backend = CSVAppendBackend()
+    backend.write_batch([("Alice", "t1", "Opened page", ""), ("bob", "t2", "Ran quiz", "5 questions")])
+    backend.write_batch([("Alice", "t3", "Used Mentor", "Persona: CEO, \"quoted\"")])
+
+    assert read_csv("alice") == [
+        FIELDS,
+        ["t1", "Opened page", ""],
+        ["t3", "Used Mentor", "Persona: CEO, \"quoted\""],
+    ]
+    assert read_csv("bob") == [FIELDS, ["t2", "Ran quiz", "5 questions"]]
+
+
+def test_sqlite_backend_appends(data_dir):
+    backend = SQLiteBackend()
+    backend.write_batch([("Alice", "t1", "Opened page", "")])
+    backend.write_batch([("bob", "t2", "Ran quiz", "5 questions")])
+    # A second instance reuses the existing database
+    SQLiteBackend().write_batch([("Alice", "t3", "Used Mentor", "")])
+
+    assert read_sqlite(backend) == [
+        ("alice", "Opened page", ""),
+        ("bob", "Ran quiz", "5 questions"),
+        ("alice", "Used Mentor", ""),
+    ]
+
+
+class RecordingBackend:
+    def __init__(self, fail_first=False):
+        self.batches = []
+        self.fail_first = fail_first
+
+    def write_batch(self, records):
+        if self.fail_first:
+            self.fail_first = False
+            raise OSError("disk full")
+        self.batches.append(list(records))
+
+
+@pytest.mark.parametrize("backend_name", ["csv", "sqlite", "recording"])
+def test_concurrent_logging_keeps_every_record_in_order(data_dir, backend_name):
+    backend = {"csv": CSVAppendBackend, "sqlite": SQLiteBackend, "recording": RecordingBackend}[backend_name]()
+    logger = ActivityLogger(backend, flush_interval=0.01, max_batch=7)
+    threads, per_thread = 8, 50
+
+    def worker(n):
+        for i in range(per_thread):
+            logger.log(f"user{n % 2}", f"event {n}-{i}")
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    logger.close()
+
+    if backend_name == "csv":
+        activities = [row[1] for user in ("user0", "user1") for row in read_csv(user)[1:]]
+    elif backend_name == "sqlite":
+        activities = [activity for _, activity, _ in read_sqlite(backend)]
+    else:
+        assert all(len(batch) <= 7 for batch in backend.batches)
+        activities = [record[2] for batch in backend.batches for record in batch]
+
+    assert len(activities) == threads * per_thread
+    assert len(set(activities)) == threads * per_thread
+    for n in range(threads):
+        mine = [a for a in activities if a.startswith(f"event {n}-")]
+        assert mine == [f"event {n}-{i}" for i in range(per_thread)]
+
+
+def test_write_failure_is_logged_and_later_batches_still_written(caplog):
+    backend = RecordingBackend(fail_first=True)
+    logger = ActivityLogger(backend, flush_interval=60, max_batch=2)
+    for i in range(4):
+        logger._queue.put(("alice", "t", f"event {i}", ""))
+    logger.close()
+
+    assert "Activity log write failed (2 records dropped)" in caplog.text
+    assert backend.batches == [[("alice", "t", "event 2", ""), ("alice", "t", "event 3", "")]]
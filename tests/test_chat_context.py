@@ -0,0 +1,96 @@
+from concurrent.futures import Future
+
+import pytest
+
+from utils import chat_context
+from utils.chat_context import ChatMemory, message_tokens
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    """
+    Counts words as tokens, so the tests don't need tiktoken's encoding files.
+    """
+    monkeypatch.setattr(chat_context, "count_tokens", lambda text: len(text.split()))
+    message_tokens.cache_clear()
+    yield
+    message_tokens.cache_clear()
+
+
+@pytest.fixture
+def summaries(monkeypatch):
+    """
+    Replaces the summary request with Futures the test resolves itself.
+    """
+    futures = []
+
+    def submit(messages, api_key, **params):
+        future = Future()
+        futures.append(future)
+        return future
+
+    monkeypatch.setattr(chat_context, "submit_chat_completion", submit)
+    return futures
+
+
+def turn(i):
+    return {"role": "user" if i % 2 == 0 else "assistant", "content": f"Turn {i}: " + "word " * 30}
+
+
+def chat(memory, history, turns, summaries):
+    for i in range(len(history), len(history) + turns):
+        history.append(turn(i))
+        memory.build_messages("System.", history)
+        memory.after_turn(history, "sk-test")
+        for future in summaries:
+            if not future.done():
+                future.set_result(f"Summary up to turn {i}")
+
+
+def test_small_window_is_summarized(summaries):
+    memory = ChatMemory(window_tokens=200)
+    history = []
+    chat(memory, history, 12, summaries)
+    assert memory.window_target_tokens == 120
+    memory.build_messages("System.", history)
+    assert memory.summarized > 0
+    assert sum(message_tokens(m["content"]) for m in history[memory.summarized:]) <= memory.window_tokens
+
+
+@pytest.mark.parametrize("window_target_tokens, folded", [(None, 3), (50, 5)])
+def test_fold_stops_at_window_target(summaries, window_target_tokens, folded):
+    # Six turns of 36 tokens each overflow a 200-token window
+    memory = ChatMemory(window_tokens=200, window_target_tokens=window_target_tokens)
+    history = [turn(i) for i in range(6)]
+    memory.after_turn(history, "sk-test")
+    summaries[0].set_result("Summary")
+    memory.build_messages("System.", history)
+    assert memory.summarized == folded
+
+
+def test_pending_summary_is_not_waited_for(summaries):
+    memory = ChatMemory(window_tokens=200)
+    history = [turn(i) for i in range(8)]
+    memory.after_turn(history, "sk-test")
+    assert len(summaries) == 1
+
+    # Not done yet: the full window is still sent, without a summary
+    messages = memory.build_messages("System.", history)
+    assert memory.summarized == 0
+    assert "Summary" not in messages[0]["content"]
+
+    summaries[0].set_result("The user asked about budgets.")
+    messages = memory.build_messages("System.", history)
+    assert memory.summarized > 0
+    assert "The user asked about budgets." in messages[0]["content"]
+    assert len(messages) == 1 + len(history) - memory.summarized
+
+
+def test_failed_summary_leaves_turns_unsummarized(summaries):
+    memory = ChatMemory(window_tokens=200)
+    history = [turn(i) for i in range(8)]
+    memory.after_turn(history, "sk-test")
+    summaries[0].set_exception(RuntimeError("rate limited"))
+    memory.build_messages("System.", history)
+    assert memory.summarized == 0
+    assert memory.summary == ""
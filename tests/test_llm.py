@@ -0,0 +1,212 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+
+from utils import llm
+from utils.response_cache import ResponseCache, make_key
+
+MESSAGES = llm.build_messages("You are terse.", "Say hello.")
+
+
+def completion(content):
+    return 200, {"Content-Type": "application/json"}, json.dumps({
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": llm.DEFAULT_MODEL,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+    })
+
+
+def stream(*parts):
+    events = [
+        json.dumps({
+            "id": "chatcmpl-test",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": llm.DEFAULT_MODEL,
+            "choices": [{"index": 0, "delta": {"content": part}, "finish_reason": None}],
+        })
+        for part in parts
+    ]
+    body = "".join(f"data: {event}\n\n" for event in events + ["[DONE]"])
+    return 200, {"Content-Type": "text/event-stream"}, body
+
+
+def error(status, retry_after=None):
+    headers = {"Content-Type": "application/json"}
+    if retry_after is not None:
+        headers["Retry-After"] = retry_after
+    return status, headers, json.dumps({"error": {"message": f"status {status}", "type": "test"}})
+
+
+class StubServer:
+    """
+    OpenAI-compatible HTTP stub that answers requests from a script of
+    (status, headers, body) responses, in order.
+    """
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                stub.requests.append((self.path, json.loads(self.rfile.read(length) or b"{}")))
+                status, headers, body = stub.responses.pop(0) if stub.responses else error(500)
+                data = body.encode("utf-8")
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = StubServer()
+    monkeypatch.setenv("OPENAI_BASE_URL", server.url)
+    monkeypatch.setattr(llm, "BASE_URL", server.url)
+    monkeypatch.setattr(llm, "MAX_RETRIES", 3)
+    monkeypatch.setattr(llm, "BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(llm, "_rate_limited_until", 0.0)
+    llm.get_client.clear()
+    yield server
+    llm.get_client.clear()
+    server.close()
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """
+    Records every backoff delay the retry helpers wait for.
+    """
+    recorded = []
+    backoff_delay = llm.backoff_delay
+
+    def spy(attempt, error=None):
+        delay = backoff_delay(attempt, error)
+        recorded.append(delay)
+        return delay
+
+    monkeypatch.setattr(llm, "backoff_delay", spy)
+    return recorded
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ResponseCache(directory=str(tmp_path))
+    monkeypatch.setattr(llm, "get_cache", lambda: cache)
+    return cache
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503])
+def test_with_retries_retries_transient_errors(stub, delays, status):
+    stub.responses = [error(status), error(status), completion("Hello")]
+    assert llm.chat_completion(MESSAGES, "sk-test") == "Hello"
+    assert len(stub.requests) == 3
+    assert len(delays) == 2
+
+
+def test_with_retries_honours_retry_after(stub, delays):
+    stub.responses = [error(429, retry_after="0.2"), completion("Hello")]
+    start = time.monotonic()
+    assert llm.chat_completion(MESSAGES, "sk-test") == "Hello"
+    assert delays == [0.2]
+    assert time.monotonic() - start >= 0.2
+
+
+def test_with_retries_gives_up_after_max_retries(stub, delays):
+    stub.responses = [error(503)] * (llm.MAX_RETRIES + 1)
+    with pytest.raises(openai.InternalServerError):
+        llm.chat_completion(MESSAGES, "sk-test")
+    assert len(stub.requests) == llm.MAX_RETRIES + 1
+
+
+@pytest.mark.parametrize("status, exception", [
+    (400, openai.BadRequestError),
+    (401, openai.AuthenticationError),
+    (404, openai.NotFoundError),
+])
+def test_with_retries_raises_client_errors_immediately(stub, delays, status, exception):
+    stub.responses = [error(status), completion("Hello")]
+    with pytest.raises(exception):
+        llm.chat_completion(MESSAGES, "sk-test")
+    assert len(stub.requests) == 1
+    assert delays == []
+
+
+def test_awith_retries_honours_retry_after(stub, delays):
+    stub.responses = [error(429, retry_after="0.2"), error(502), completion("Hello")]
+    start = time.monotonic()
+    assert asyncio.run(llm.achat_completion(MESSAGES, "sk-test")) == "Hello"
+    assert len(stub.requests) == 3
+    assert delays[0] == 0.2
+    assert time.monotonic() - start >= 0.2
+
+
+def test_awith_retries_raises_client_errors_immediately(stub, delays):
+    stub.responses = [error(400), completion("Hello")]
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(llm.achat_completion(MESSAGES, "sk-test"))
+    assert len(stub.requests) == 1
+    assert delays == []
+
+
+def test_stream_chat_completion_caches_assembled_text(stub, cache):
+    stub.responses = [stream("Hel", "lo", "!")]
+    parts = list(llm.stream_chat_completion(MESSAGES, "sk-test", cache=True))
+    assert parts == ["Hel", "lo", "!"]
+    assert stub.requests[0][1]["stream"] is True
+    assert cache.get(make_key(llm.DEFAULT_MODEL, MESSAGES, {})) == "Hello!"
+
+    # A repeat is answered from the cache in one piece, without a request
+    assert list(llm.stream_chat_completion(MESSAGES, "sk-test", cache=True)) == ["Hello!"]
+    assert len(stub.requests) == 1
+
+
+def test_stream_chat_completion_without_cache_leaves_cache_empty(stub, cache):
+    stub.responses = [stream("Hello")]
+    assert list(llm.stream_chat_completion(MESSAGES, "sk-test")) == ["Hello"]
+    assert cache.get(make_key(llm.DEFAULT_MODEL, MESSAGES, {})) is None
+
+
+@pytest.fixture
+def broken_cache(cache, monkeypatch):
+    def fail(key, value):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(cache, "set", fail)
+    return cache
+
+
+def test_cache_write_failure_keeps_the_answer(stub, broken_cache, caplog):
+    stub.responses = [completion("Hello"), stream("Hel", "lo")]
+    assert llm.chat_completion(MESSAGES, "sk-test", cache=True) == "Hello"
+    assert list(llm.stream_chat_completion(MESSAGES, "sk-test", cache=True)) == ["Hel", "lo"]
+    assert caplog.text.count("Response cache write failed") == 2
+
+
+def test_async_cache_write_failure_keeps_the_answer(stub, broken_cache, caplog):
+    stub.responses = [completion("Hello")]
+    assert asyncio.run(llm.achat_completion(MESSAGES, "sk-test", cache=True)) == "Hello"
+    assert "Response cache write failed" in caplog.text
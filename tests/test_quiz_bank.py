@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import pytest
+
+from utils import quiz_bank
+
+DIMENSION = 256
+TOPIC = "World capitals"
+
+
+class HashEmbedder:
+    """
+    Deterministic bag-of-words embedder: every word is hashed into one of
+    DIMENSION buckets, so questions sharing most of their words are close.
+    Records the texts it is asked to embed.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        vectors = np.zeros((len(texts), DIMENSION), dtype="float32")
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                vectors[row, int(hashlib.sha256(word.encode("utf-8")).hexdigest(), 16) % DIMENSION] += 1
+        return vectors
+
+
+def question(text, answer="Paris"):
+    return {
+        "question": text,
+        "options": [answer, "Lyon", "Nice", "Lille"],
+        "correct_answer": answer,
+        "explanation": f"The answer is {answer}.",
+    }
+
+
+def similarity(embed_fn, a, b):
+    vectors = quiz_bank._normalize(embed_fn([a, b]))
+    return float(vectors[0] @ vectors[1])
+
+
+@pytest.fixture
+def embed_fn(data_dir, monkeypatch):
+    monkeypatch.setattr(quiz_bank, "_banks", {})
+    monkeypatch.setattr(quiz_bank, "_topping_up", set())
+    return HashEmbedder()
+
+
+def test_rejects_exact_duplicates(embed_fn):
+    first = question("What is the capital of France?")
+    assert quiz_bank.add_questions(TOPIC, [first], embed_fn) == [first]
+    # Same question up to case, spacing and punctuation
+    assert quiz_bank.add_questions(TOPIC, [question("what is the capital of  France")], embed_fn) == []
+    assert quiz_bank.load_questions(TOPIC) == [first]
+
+
+def test_rejects_near_duplicates_at_threshold(embed_fn):
+    original = "What is the capital of France?"
+    near = "What is the capital city of France?"
+    distinct = "Which river flows through Budapest?"
+    assert similarity(embed_fn, original, near) >= quiz_bank.SIMILARITY_THRESHOLD
+    assert similarity(embed_fn, original, distinct) < quiz_bank.SIMILARITY_THRESHOLD
+
+    quiz_bank.add_questions(TOPIC, [question(original)], embed_fn)
+    added = quiz_bank.add_questions(TOPIC, [question(near), question(distinct, "Danube")], embed_fn)
+    assert [q["question"] for q in added] == [distinct]
+
+
+def test_rejects_near_duplicates_within_one_batch(embed_fn):
+    batch = [question("What is the capital of France?"), question("What is the capital city of France?")]
+    assert quiz_bank.add_questions(TOPIC, batch, embed_fn) == batch[:1]
+
+
+def test_bank_persists_questions_and_embeddings(embed_fn):
+    quiz_bank.add_questions(TOPIC, [question("What is the capital of France?")], embed_fn)
+    quiz_bank._banks.clear()
+
+    bank = quiz_bank.get_bank(TOPIC)
+    assert [q["question"] for q in bank.questions] == ["What is the capital of France?"]
+    assert np.load(bank.embeddings_path).shape == (1, DIMENSION)
+
+
+def test_embeddings_rebuilt_lazily_for_questions_banked_without_them(embed_fn):
+    old = [question("What is the capital of France?"), question("Which river flows through Budapest?", "Danube")]
+    bank = quiz_bank.get_bank(TOPIC)
+    with open(bank.questions_path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(q) + "\n" for q in old)
+    quiz_bank._banks.clear()
+
+    bank = quiz_bank.get_bank(TOPIC)
+    assert len(bank.questions) == 2
+    assert not os.path.exists(bank.embeddings_path)
+    assert embed_fn.calls == []
+
+    new = question("Which country has Ottawa as its capital?", "Canada")
+    assert quiz_bank.add_questions(TOPIC, [new, question("What is the capital city of France?")], embed_fn) == [new]
+    # The new candidates, then the banked questions that had no vector yet
+    assert embed_fn.calls[1] == [q["question"] for q in old]
+    assert np.load(bank.embeddings_path).shape == (3, DIMENSION)
+
+
+def test_embeddings_rebuilt_only_for_questions_missing_a_vector(embed_fn):
+    quiz_bank.add_questions(TOPIC, [question("What is the capital of France?")], embed_fn)
+    bank = quiz_bank.get_bank(TOPIC)
+    with open(bank.questions_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(question("Which river flows through Budapest?", "Danube")) + "\n")
+    quiz_bank._banks.clear()
+    embed_fn.calls.clear()
+
+    quiz_bank.add_questions(TOPIC, [question("Which country has Ottawa as its capital?", "Canada")], embed_fn)
+    assert embed_fn.calls[1] == ["Which river flows through Budapest?"]
+    assert np.load(bank.embeddings_path).shape == (3, DIMENSION)
+
+
+def test_quiz_job_requests_only_missing_questions(embed_fn, monkeypatch):
+    banked = question("What is the capital of France?")
+    quiz_bank.add_questions(TOPIC, [banked], embed_fn)
+
+    streamed = [
+        question("Which river flows through Budapest?", "Danube"),
+        question("What is the capital city of France?"),  # Near-duplicate of the banked one
+        {"question": "Missing its options"},  # Fails validation
+        question("Which country has Ottawa as its capital?", "Canada"),
+    ]
+    text = json.dumps({"items": streamed})
+
+    def fake_stream(messages, api_key, **params):
+        for start in range(0, len(text), 7):
+            yield text[start:start + 7]
+
+    requested = []
+    refill = [
+        question("Which ocean lies west of Portugal?", "Atlantic"),
+        question("On which continent is Kenya?", "Africa"),
+    ]
+
+    def fake_generate_items(schema, messages, count, api_key, **params):
+        requested.append(count)
+        return refill[:count]
+
+    monkeypatch.setattr(quiz_bank, "stream_chat_completion", fake_stream)
+    monkeypatch.setattr(quiz_bank, "generate_items", fake_generate_items)
+
+    job = quiz_bank.QuizJob(TOPIC, 4, "sk-test", avoid=[banked], embed_fn=embed_fn)
+    job.future.result(timeout=10)
+
+    assert job.error is None
+    assert requested == [2]
+    assert [q["question"] for q in job.questions] == [
+        "Which river flows through Budapest?",
+        "Which country has Ottawa as its capital?",
+        "Which ocean lies west of Portugal?",
+        "On which continent is Kenya?",
+    ]
+    assert job.wait_for(4, timeout=0)
+    assert len(quiz_bank.load_questions(TOPIC)) == 5
+
+
+def test_quiz_job_skips_refill_when_stream_is_complete(embed_fn, monkeypatch):
+    text = json.dumps({"items": [question("Which river flows through Budapest?", "Danube")]})
+    monkeypatch.setattr(quiz_bank, "stream_chat_completion", lambda *args, **kwargs: iter([text]))
+    monkeypatch.setattr(quiz_bank, "generate_items", pytest.fail)
+
+    job = quiz_bank.QuizJob(TOPIC, 1, "sk-test", embed_fn=embed_fn)
+    job.future.result(timeout=10)
+    assert job.error is None
+    assert len(job.questions) == 1
+
+
+def test_quiz_job_runs_on_its_own_pool(embed_fn, monkeypatch):
+    threads = []
+
+    def fake_stream(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        yield json.dumps({"items": [question("Which river flows through Budapest?", "Danube")]})
+
+    monkeypatch.setattr(quiz_bank, "stream_chat_completion", fake_stream)
+    job = quiz_bank.QuizJob(TOPIC, 1, "sk-test", embed_fn=embed_fn)
+    job.future.result(timeout=10)
+    assert threads[0].startswith("quiz-job")
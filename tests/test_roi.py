@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from utils import roi
+
+FLOWS = np.array([[-100.0, 60.0, 60.0, 60.0]])
+
+INPUTS = {
+    "investment": 100.0,
+    "annual_benefit": 60.0,
+    "annual_cost": 0.0,
+    "discount_rate": 0.10,
+    "years": 3,
+    "ramp": [1.0],
+}
+RANGES = {
+    "investment": (80.0, 150.0),
+    "annual_benefit": (30.0, 80.0),
+    "adoption": (0.5, 1.0),
+    "discount_rate": (0.05, 0.15),
+}
+
+
+def test_known_values():
+    assert roi.npv(FLOWS, 0.10)[0] == pytest.approx(49.2111, abs=1e-4)
+    assert roi.irr(FLOWS)[0] == pytest.approx(0.363097, abs=1e-6)
+    assert roi.payback_years(FLOWS)[0] == pytest.approx(5 / 3)
+    assert roi.roi(FLOWS)[0] == pytest.approx(0.8)
+
+
+def test_npv_at_irr_is_zero():
+    flows = np.array([[-250.0, 40.0, 90.0, 120.0, 80.0], [-100.0, 60.0, 60.0, 60.0, 0.0]])
+    assert roi.npv(flows, roi.irr(flows)) == pytest.approx([0.0, 0.0], abs=1e-8)
+
+
+def test_npv_matches_direct_discounting():
+    flows = np.array([[-500.0, 100.0, 200.0, 300.0, 150.0]])
+    rate = 0.07
+    expected = sum(cf / (1 + rate) ** t for t, cf in enumerate(flows[0]))
+    assert roi.npv(flows, rate)[0] == pytest.approx(expected)
+
+
+def test_no_payback_gives_nan():
+    flows = np.array([[-100.0, 10.0, 10.0, 10.0]])
+    assert np.isnan(roi.payback_years(flows)[0])
+    # Still has a (negative) IRR
+    assert roi.irr(flows)[0] == pytest.approx(-0.4244, abs=1e-4)
+
+
+def test_no_sign_change_gives_nan_irr():
+    flows = np.array([[-100.0, -10.0, -10.0, -10.0], [100.0, 10.0, 10.0, 10.0]])
+    assert np.isnan(roi.irr(flows)).all()
+
+
+def test_payback_on_exact_recovery_and_without_investment():
+    flows = np.array([[-100.0, 50.0, 50.0, 10.0], [0.0, 10.0, 10.0, 10.0]])
+    assert roi.payback_years(flows).tolist() == [2.0, 0.0]
+    assert np.isnan(roi.roi(flows)[1])
+
+
+def test_cash_flows_follow_adoption_ramp():
+    flows = roi.cash_flows(1000, 500, 100, 1.0, [0.4, 0.8], years=4)
+    assert flows.tolist() == [[-1000.0, 100.0, 300.0, 300.0, 300.0]]
+
+
+@pytest.mark.parametrize("text, ramp", [("40, 80, 100", [0.4, 0.8, 1.0]), ("50;100", [0.5, 1.0])])
+def test_parse_ramp(text, ramp):
+    assert roi.parse_ramp(text) == pytest.approx(ramp)
+
+
+@pytest.mark.parametrize("text", ["", " , ", "40, -10", "forty"])
+def test_parse_ramp_rejects_invalid_input(text):
+    with pytest.raises(ValueError):
+        roi.parse_ramp(text)
+
+
+def test_evaluate_base_case():
+    results = roi.evaluate(INPUTS)
+    assert results["npv"][0] == pytest.approx(49.2111, abs=1e-4)
+    assert results["irr"][0] == pytest.approx(0.363097, abs=1e-6)
+
+
+def test_monte_carlo_is_reproducible_with_a_seed():
+    first = roi.monte_carlo(INPUTS, RANGES, draws=5000, seed=7)
+    second = roi.monte_carlo(INPUTS, RANGES, draws=5000, seed=7)
+    other = roi.monte_carlo(INPUTS, RANGES, draws=5000, seed=8)
+    assert first["npv"].shape == (5000,)
+    np.testing.assert_array_equal(first["npv"], second["npv"])
+    assert not np.array_equal(first["npv"], other["npv"])
+
+
+def test_monte_carlo_stays_within_ranges():
+    results = roi.monte_carlo(INPUTS, RANGES, draws=5000)
+    investment = -results["flows"][:, 0]
+    assert investment.min() >= 80.0 and investment.max() <= 150.0
+    table, probability = roi.summarize_simulation(results)
+    assert list(table.index) == ["P5", "P25", "P50", "P75", "P95"]
+    assert table["NPV"].is_monotonic_increasing
+    assert 0.0 <= probability["npv_positive"] <= 1.0
+
+
+def test_tornado_sorted_by_swing():
+    table = roi.tornado(INPUTS, RANGES)
+    assert table["Swing"].is_monotonic_decreasing
+    assert table.attrs["base_npv"] == pytest.approx(49.2111, abs=1e-4)
+    row = table.set_index("Input").loc["Upfront investment"]
+    assert row["NPV at low"] - row["NPV at high"] == pytest.approx(70.0)
@@ -0,0 +1,76 @@
+import json
+import math
+
+import pytest
+
+from utils.scenario_batch import RESULT_FIELDS, SCENARIO_RESULT, comparison_table, expand_template, parse_result
+
+SCORE = RESULT_FIELDS["impact_score"]
+
+
+def answer(**overrides):
+    data = {key: f"{key} text" for key in RESULT_FIELDS}
+    data["impact_score"] = 2
+    return json.dumps({**data, **overrides})
+
+
+def test_expand_template_over_all_combinations():
+    assert expand_template("Cut {region} by {cut}%", "region: EMEA, APAC\ncut: 10, 20") == [
+        "Cut EMEA by 10%", "Cut EMEA by 20%", "Cut APAC by 10%", "Cut APAC by 20%",
+    ]
+
+
+def test_expand_template_keeps_escaped_braces():
+    assert expand_template("Set {{region}} to {region}", "region: EMEA") == ["Set {region} to EMEA"]
+
+
+@pytest.mark.parametrize("template", ["What if {}?", "What if {0}?", "What if {region.name}?", "What if {region"])
+def test_expand_template_rejects_malformed_templates(template):
+    with pytest.raises(ValueError):
+        expand_template(template, "region: EMEA")
+
+
+def test_expand_template_requires_values():
+    with pytest.raises(ValueError, match="cut"):
+        expand_template("Cut {region} by {cut}%", "region: EMEA")
+
+
+def test_expand_template_rejects_oversized_sweeps():
+    with pytest.raises(ValueError, match="400"):
+        expand_template("{a} {b}", f"a: {', '.join(map(str, range(20)))}\nb: {', '.join(map(str, range(20)))}",
+                        max_scenarios=100)
+
+
+def test_parse_result_maps_fields():
+    row = parse_result(answer(impact_score="-3"))
+    assert row[SCORE] == -3
+    assert row[RESULT_FIELDS["risks"]] == "risks text"
+    assert "Error" not in row
+
+
+@pytest.mark.parametrize("score", [{"value": 3}, [1, 2], True, None, "high"])
+def test_parse_result_blanks_non_numeric_scores(score):
+    row = parse_result(answer(impact_score=score))
+    assert math.isnan(row[SCORE])
+    assert "impact_score" in row["Error"]
+
+
+def test_comparison_table_survives_malformed_answers():
+    results = [answer(), answer(impact_score={"value": 3}), answer(risks=["a", "b"]), "not json", RuntimeError("boom")]
+    table = comparison_table([f"Scenario {i}" for i in range(len(results))], results)
+    assert len(table) == len(results)
+    assert table[SCORE].iloc[0] == 2
+    assert table["Error"].isna().tolist() == [True, False, False, False, False]
+    assert table[RESULT_FIELDS["risks"]].isna().tolist() == [False, False, True, True, True]
+
+
+def test_comparison_table_drops_error_column_when_all_succeed():
+    table = comparison_table(["a", "b"], [answer(), answer(impact_score=-1)])
+    assert "Error" not in table
+    assert table[SCORE].tolist() == [2, -1]
+
+
+def test_scenario_result_format_is_strict():
+    schema = SCENARIO_RESULT.object_format()["json_schema"]
+    assert schema["strict"] is True
+    assert set(schema["schema"]["required"]) == set(RESULT_FIELDS)
@@ -0,0 +1,60 @@
+import io
+
+import pandas as pd
+import pytest
+
+from utils.skills import ALL_ROLES, UNASSIGNED, aggregate_csv, aggregate_skills, detect_schema
+
+CSV = b"""id,department,role,skills
+1,HR,Lead,Excel; SQL
+2,HR,Lead,excel
+3,IT,Dev,Python
+4,IT,Dev,python;SQL
+5,HR,,SQL
+6,,Dev,SQL
+,IT,Dev,Python
+,IT,Dev,Docker
+"""
+
+
+def frame():
+    return pd.read_csv(io.BytesIO(CSV))
+
+
+def aggregates():
+    schema = detect_schema(frame().columns)
+    yield aggregate_skills(frame(), schema)
+    for chunksize in (2, 3, 100):
+        yield aggregate_csv(io.BytesIO(CSV), schema, chunksize=chunksize)
+
+
+def test_detect_schema():
+    assert detect_schema(frame().columns) == {"skills": "skills", "department": "department", "role": "role",
+                                              "employee": "id"}
+
+
+@pytest.mark.parametrize("headcount, counts", list(aggregates()))
+def test_blank_department_role_and_employee_cells_are_kept(headcount, counts):
+    assert headcount.to_dict() == {
+        ("HR", ALL_ROLES): 1,
+        ("HR", "Lead"): 2,
+        ("IT", "Dev"): 4,  # Two employees without an id count once each
+        (UNASSIGNED, "Dev"): 1,
+    }
+    assert headcount.sum() == len(frame())
+    assert counts.loc[("HR", ALL_ROLES), "sql"] == 1
+    assert counts.loc[(UNASSIGNED, "Dev"), "sql"] == 1
+    assert counts.loc[("HR", "Lead"), "excel"] == 2
+    assert counts.loc[("IT", "Dev"), "python"] == 3
+
+
+def test_aggregate_without_employee_column_counts_rows():
+    schema = {**detect_schema(frame().columns), "employee": None}
+    headcount, counts = aggregate_csv(io.BytesIO(CSV), schema, chunksize=3)
+    assert headcount.sum() == len(frame())
+    assert counts.loc[("IT", "Dev"), "python"] == 3
+
+
+def test_aggregate_requires_skills_column():
+    with pytest.raises(ValueError):
+        aggregate_skills(frame(), {"skills": None})
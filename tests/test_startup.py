@@ -0,0 +1,56 @@
+import glob
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.bench_startup import ROOT, interpreter_modules, measure_imports, measure_render, page_imports
+
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "2000"))
+RENDER_BUDGET_MS = float(os.getenv("STARTUP_RENDER_BUDGET_MS", "3000"))
+RENDER_TIMEOUT = 60.0
+
+# Only needed once a page actually does the work, so never at import time
+DEFERRED_MODULES = ("moviepy", "pandas", "PyPDF2", "openai")
+
+PAGES = ["app.py"] + sorted(os.path.relpath(p, ROOT) for p in glob.glob(os.path.join(ROOT, "pages", "*.py")))
+
+LOADED_SCRIPT = """
+import json, sys
+exec(compile(sys.stdin.read(), "<page imports>", "exec"))
+print(json.dumps(sorted(name for name in sys.argv[1:] if name in sys.modules)))
+"""
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    return interpreter_modules()
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_page_imports_within_budget(page, baseline):
+    import_ms, top_level, error = measure_imports(page, baseline)
+    assert error is None, error
+    heaviest = ", ".join(
+        f"{name} {cumulative / 1000:.0f}ms" for name, _, cumulative in sorted(top_level, key=lambda e: -e[2])[:3]
+    )
+    assert import_ms <= IMPORT_BUDGET_MS, f"imports took {import_ms:.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms): {heaviest}"
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_page_first_render_within_budget(page):
+    render_ms, error = measure_render(page, RENDER_TIMEOUT)
+    assert error is None, error
+    assert render_ms <= RENDER_BUDGET_MS, f"first render took {render_ms:.0f} ms (budget {RENDER_BUDGET_MS:.0f} ms)"
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_page_imports_defer_heavy_modules(page):
+    result = subprocess.run(
+        [sys.executable, "-c", LOADED_SCRIPT, *DEFERRED_MODULES],
+        input=page_imports(os.path.join(ROOT, page)), cwd=ROOT, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
@@ -0,0 +1,66 @@
+import os
+import time
+
+from utils.chat_context import ChatMemory
+from utils.transcript import load_spilled, prune_transcripts, transcript_file, trim_transcript
+
+
+def conversation(prefix, count):
+    return [{"role": "user", "content": f"{prefix}{i}"} for i in range(count)]
+
+
+def contents(messages):
+    return [m["content"] for m in messages]
+
+
+def test_trim_enforces_cap_without_summaries(data_dir):
+    memory = ChatMemory()
+    messages = conversation("m", 105)
+    trim_transcript(messages, memory, "alice", "coach", max_messages=100)
+    assert len(messages) == 100
+    assert contents(messages[:1]) == ["m5"]
+    assert memory.spilled == 5
+    assert memory.summarized == 0
+
+
+def test_conversations_spill_to_separate_files(data_dir):
+    first, second = ChatMemory(), ChatMemory()
+    trim_transcript(conversation("a", 13), first, "alice", "coach", max_messages=10)
+    trim_transcript(conversation("b", 12), second, "alice", "coach", max_messages=10)
+    assert contents(load_spilled("alice", "coach", first.conversation_id, 0, first.spilled)) == ["a0", "a1", "a2"]
+    assert contents(load_spilled("alice", "coach", second.conversation_id, 0, second.spilled)) == ["b0", "b1"]
+
+
+def test_load_spilled_reads_only_the_requested_slice(data_dir):
+    memory = ChatMemory()
+    trim_transcript(conversation("m", 60), memory, "alice", "mentor", max_messages=10)
+    assert contents(load_spilled("alice", "mentor", memory.conversation_id, 20, 23)) == ["m20", "m21", "m22"]
+    assert load_spilled("alice", "mentor", memory.conversation_id, 5, 5) == []
+    assert load_spilled("alice", "mentor", "missing", 0, 10) == []
+
+
+def test_prune_keeps_newest_transcripts_within_retention(data_dir):
+    os.makedirs(data_dir)
+    now = time.time()
+    paths = []
+    for age_days in (0, 1, 2, 40):
+        path = transcript_file("alice", "coach", f"conv{age_days}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{}\n")
+        os.utime(path, (now - age_days * 86400, now - age_days * 86400))
+        paths.append(path)
+    other_chat = transcript_file("alice", "mentor", "conv99")
+    open(other_chat, "w").close()
+
+    prune_transcripts("alice", "coach", keep=2, retention_days=30)
+    assert [os.path.exists(p) for p in paths] == [True, True, False, False]
+    assert os.path.exists(other_chat)
+
+
+def test_first_spill_prunes_old_transcripts(data_dir):
+    os.makedirs(data_dir)
+    stale = transcript_file("alice", "coach", "stale")
+    open(stale, "w").close()
+    os.utime(stale, (0, 0))
+    trim_transcript(conversation("m", 11), ChatMemory(), "alice", "coach", max_messages=10)
+    assert not os.path.exists(stale)
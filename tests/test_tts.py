@@ -0,0 +1,113 @@
+import os
+import threading
+
+import pytest
+
+from utils import tts
+
+
+class StubBackend:
+    """
+    Local stand-in for gTTS: returns a fake ID3-tagged MP3 per chunk and
+    records which texts it was asked to synthesize.
+    """
+
+    name = "stub"
+
+    def __init__(self, size=0):
+        self.size = size
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def synthesize(self, text, lang):
+        with self._lock:
+            self.calls.append(text)
+        frames = f"<{lang}:{text}>".encode("utf-8").ljust(self.size, b".")
+        return id3_tag(b"TIT2" + text.encode("utf-8")) + frames
+
+
+def id3_tag(payload):
+    size = len(payload)
+    syncsafe = bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+    return b"ID3\x04\x00\x00" + syncsafe + payload
+
+
+@pytest.fixture
+def backend(data_dir, monkeypatch):
+    monkeypatch.setattr(tts, "_cache", None)
+    stub = StubBackend()
+    monkeypatch.setattr(tts, "_backend", stub)
+    return stub
+
+
+def cached_files():
+    directory = os.path.join("user_data", "tts_cache")
+    return sorted(name for name in os.listdir(directory) if name.endswith(".mp3"))
+
+
+def test_split_sentences_keeps_chunks_within_limit():
+    text = "Short one. " + ", ".join(["a clause of words"] * 10) + "! " + "x" * 45 + "\nLast line"
+    chunks = tts.split_sentences(text, max_chars=40)
+    assert chunks[0] == "Short one."
+    assert chunks[-1] == "Last line"
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert "".join(chunks).replace(" ", "") == text.replace(" ", "").replace("\n", "")
+
+
+def test_split_long_prefers_commas_over_spaces():
+    sentence = "alpha beta, gamma delta epsilon zeta eta"
+    assert tts._split_long(sentence, 30) == ["alpha beta,", "gamma delta epsilon zeta eta"]
+
+
+def test_split_long_falls_back_to_spaces_and_hard_cuts():
+    assert tts._split_long("alpha beta gamma delta", 12) == ["alpha beta", "gamma delta"]
+    assert tts._split_long("x" * 25, 10) == ["x" * 10, "x" * 10, "x" * 5]
+
+
+def test_join_mp3_strips_id3_from_later_segments():
+    first, second = id3_tag(b"one") + b"FRAMES1", id3_tag(b"two") + b"FRAMES2"
+    assert tts.join_mp3([first, second, b"FRAMES3"]) == first + b"FRAMES2" + b"FRAMES3"
+    assert tts.join_mp3([]) == b""
+
+
+def test_only_edited_sentences_are_resynthesized(backend):
+    text = "First sentence. Second sentence. Third sentence."
+    segments = list(tts.iter_segments(text))
+    assert len(segments) == 3
+    assert sorted(backend.calls) == ["First sentence.", "Second sentence.", "Third sentence."]
+
+    backend.calls.clear()
+    edited = list(tts.iter_segments("First sentence. Second sentence, edited. Third sentence."))
+    assert backend.calls == ["Second sentence, edited."]
+    assert edited[0] == segments[0] and edited[2] == segments[2]
+
+
+def test_cache_is_keyed_by_backend(backend):
+    tts.synthesize_chunk("Hello there.")
+    other = StubBackend()
+    other.name = "other"
+    tts.synthesize_chunk("Hello there.", backend=other)
+    assert other.calls == ["Hello there."]
+    assert len(cached_files()) == 2
+
+
+def test_cache_evicts_least_recently_used(backend, monkeypatch):
+    monkeypatch.setattr(tts, "CACHE_MAX_BYTES", 1000)
+    big = StubBackend(size=300)  # About 330 bytes per file, so three fit
+    paths = {}
+    for i in range(3):
+        tts.synthesize_chunk(f"Sentence {i}.", backend=big)
+        paths[i] = tts._get_cache().path(tts._cache_key(f"Sentence {i}.", "en", big))
+        os.utime(paths[i], (i, i))
+
+    # A cache hit makes the oldest entry the most recently used
+    tts.synthesize_chunk("Sentence 0.", backend=big)
+    assert big.calls == ["Sentence 0.", "Sentence 1.", "Sentence 2."]
+
+    tts.synthesize_chunk("Sentence 3.", backend=big)
+    # Over the limit: evicted oldest-first down to 90% of it
+    assert not os.path.exists(paths[1])
+    assert not os.path.exists(paths[2])
+    assert os.path.exists(paths[0])
+    sizes = [os.path.getsize(os.path.join("user_data", "tts_cache", name)) for name in cached_files()]
+    assert len(sizes) == 2 and sum(sizes) <= 900
@@ -0,0 +1 @@
+"""Shared building blocks for the AI+ Executive Innovation Hub pages."""
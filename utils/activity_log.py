@@ -0,0 +1,172 @@
+"""
+Append-only, buffered activity logging.
+
+`log_activity` only enqueues a record; a background writer thread drains the
+queue and appends batches to the configured backend, flushing either every
+FLUSH_INTERVAL seconds or as soon as MAX_BATCH records are waiting. Nothing
+ever re-reads a user's history to add a row.
+
+Backends:
+- "csv" (default): appends to user_data/<name>_analytics.csv, same columns as before.
+- "sqlite": a single WAL-mode database at user_data/activity.db.
+
+Select the backend with the ACTIVITY_LOG_BACKEND environment variable.
+"""
+import atexit
+import csv
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+
+from utils.paths import DATA_DIR, ensure_data_dir, get_user_data_file, sanitize_username
+
+FIELDS = ["timestamp", "activity", "details"]
+FLUSH_INTERVAL = float(os.getenv("ACTIVITY_LOG_FLUSH_INTERVAL", "2.0"))
+MAX_BATCH = int(os.getenv("ACTIVITY_LOG_MAX_BATCH", "50"))
+
+logger = logging.getLogger(__name__)
+
+
+class CSVAppendBackend:
+    """
+    Appends rows to each user's analytics CSV. The header is only written
+    when the file is new, so existing files stay readable with pd.read_csv.
+    """
+
+    def write_batch(self, records):
+        by_user = {}
+        for username, timestamp, activity, details in records:
+            by_user.setdefault(username, []).append([timestamp, activity, details])
+        for username, rows in by_user.items():
+            path = get_user_data_file(username, "analytics")
+            # One buffered write per batch; O_APPEND keeps concurrent writers from clobbering each other
+            with open(path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                if f.tell() == 0:
+                    writer.writerow(FIELDS)
+                writer.writerows(rows)
+
+
+class SQLiteBackend:
+    """
+    Stores all users' activity in one SQLite database in WAL mode, which lets
+    readers run while a batch is being committed.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(DATA_DIR, "activity.db")
+        ensure_data_dir()
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS activity ("
+                    "id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL, "
+                    "timestamp TEXT NOT NULL, activity TEXT NOT NULL, details TEXT)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_activity_user ON activity (username)")
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def write_batch(self, records):
+        rows = [(sanitize_username(u), ts, act, det) for u, ts, act, det in records]
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO activity (username, timestamp, activity, details) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+        finally:
+            conn.close()
+
+
+BACKENDS = {"csv": CSVAppendBackend, "sqlite": SQLiteBackend}
+
+
+class ActivityLogger:
+    """
+    Queues activity records and writes them in batches from a daemon thread.
+    """
+
+    def __init__(self, backend, flush_interval=FLUSH_INTERVAL, max_batch=MAX_BATCH):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._write_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="activity-log-writer", daemon=True)
+        self._thread.start()
+
+    def log(self, username, activity, details=""):
+        timestamp = datetime.now().isoformat(sep=" ")
+        self._queue.put((username, timestamp, activity, details))
+        if self._queue.qsize() >= self.max_batch:
+            self._wake.set()
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """
+        Synchronously writes everything queued so far, in arrival order.
+        """
+        with self._write_lock:
+            while True:
+                batch = self._drain()
+                if not batch:
+                    return
+                try:
+                    self.backend.write_batch(batch)
+                except Exception:
+                    # Logging must never take a page down with it
+                    logger.exception("Activity log write failed (%d records dropped)", len(batch))
+
+    def close(self):
+        self._stopped.set()
+        self._wake.set()
+        self.flush()
+
+
+_logger = None
+_logger_lock = threading.Lock()
+
+
+def get_logger():
+    global _logger
+    if _logger is None:
+        with _logger_lock:
+            if _logger is None:
+                name = os.getenv("ACTIVITY_LOG_BACKEND", "csv").lower()
+                backend = BACKENDS.get(name, CSVAppendBackend)()
+                _logger = ActivityLogger(backend)
+                atexit.register(_logger.close)
+    return _logger
+
+
+def log_activity(username, activity, details=""):
+    get_logger().log(username, activity, details)
+
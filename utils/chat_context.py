@@ -0,0 +1,147 @@
+"""
+Token-budgeted conversation memory for the chat pages.
+
+Each request carries the system prompt, a rolling summary of older turns and
+a sliding window of the most recent turns, capped at MAX_PROMPT_TOKENS. When
+the unsummarized history grows past WINDOW_TOKENS, the oldest turns are folded
+into the summary by a small model on the shared thread pool after the reply
+has been shown, so the summarization never adds to the next turn's latency.
+"""
+import uuid
+from functools import lru_cache
+
+from utils.llm import submit_chat_completion
+from utils.retrieval import count_tokens, get_encoding
+
+MAX_PROMPT_TOKENS = 4000
+WINDOW_TOKENS = 2500
+WINDOW_TARGET_TOKENS = 1500  # What is left unsummarized after folding, for the default window
+MESSAGE_OVERHEAD = 4  # Role and separator tokens per chat message
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_MAX_TOKENS = 300
+
+
+@lru_cache(maxsize=4096)
+def message_tokens(content):
+    return count_tokens(content) + MESSAGE_OVERHEAD
+
+
+def truncate_to_tokens(text, max_tokens):
+    encoding = get_encoding()
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    # Keep the end of the message, which is usually the actual question
+    return encoding.decode(tokens[-max_tokens:])
+
+
+class ChatMemory:
+    """
+    Rolling summary plus sliding window over a page's chat history. The
+    history list itself stays in st.session_state; this object only tracks
+    how much of it has been folded into the summary or spilled to disk, and
+    identifies the conversation's spilled transcript.
+    """
+
+    def __init__(self, max_prompt_tokens=MAX_PROMPT_TOKENS, window_tokens=WINDOW_TOKENS, window_target_tokens=None):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.window_tokens = window_tokens
+        # By default, fold down to the same share of a custom window
+        self.window_target_tokens = (
+            window_target_tokens if window_target_tokens is not None
+            else window_tokens * WINDOW_TARGET_TOKENS // WINDOW_TOKENS
+        )
+        self.summary = ""
+        self.summarized = 0
+        self.spilled = 0
+        self.conversation_id = uuid.uuid4().hex[:16]
+        self._pending = None
+
+    def _resolve_pending(self):
+        # Never wait for the summary: until it is ready, the old summary and
+        # the wider window are used as they are
+        if self._pending is None or not self._pending[0].done():
+            return
+        future, folded_upto = self._pending
+        self._pending = None
+        try:
+            self.summary = future.result().strip()
+            self.summarized = folded_upto
+        except Exception:
+            # Leave those turns unsummarized; the window cap still bounds the prompt
+            pass
+
+    def discard_prefix(self, count):
+        """
+        Records that the first `count` messages were removed from the history
+        list. Any of them not yet summarized drop out of the model's context.
+        """
+        self.summarized = max(self.summarized - count, 0)
+        self.spilled += count
+        if self._pending is not None:
+            future, folded_upto = self._pending
+            self._pending = (future, max(folded_upto - count, 0))
+        return count
+
+    def build_messages(self, system_prompt, history):
+        """
+        Returns the API messages for the next request: system prompt with the
+        running summary, then as many recent turns as fit in the budget.
+        """
+        self._resolve_pending()
+        system_content = system_prompt
+        if self.summary:
+            system_content += f"\n\nSummary of the earlier conversation:\n{self.summary}"
+
+        budget = self.max_prompt_tokens - message_tokens(system_content)
+        window = []
+        for message in reversed(history[self.summarized:]):
+            cost = message_tokens(message["content"])
+            if cost > budget:
+                if not window:
+                    # The latest message alone is over budget; keep what fits of it
+                    content = truncate_to_tokens(message["content"], max(budget - MESSAGE_OVERHEAD, 1))
+                    window.append({"role": message["role"], "content": content})
+                break
+            window.append({"role": message["role"], "content": message["content"]})
+            budget -= cost
+        window.reverse()
+        return [{"role": "system", "content": system_content}] + window
+
+    def after_turn(self, history, api_key):
+        """
+        Starts folding the oldest unsummarized turns into the summary once the
+        window has outgrown its budget. Call after the reply has been rendered.
+        """
+        self._resolve_pending()
+        if self._pending is not None:
+            return
+        unsummarized = history[self.summarized:]
+        total = sum(message_tokens(m["content"]) for m in unsummarized)
+        if total <= self.window_tokens:
+            return
+
+        fold = 0
+        while fold < len(unsummarized) - 1 and total > self.window_target_tokens:
+            total -= message_tokens(unsummarized[fold]["content"])
+            fold += 1
+        if fold == 0:
+            return
+
+        transcript = "\n".join(f"{m['role'].upper()}: {m['content']}" for m in unsummarized[:fold])
+        prompt = f"""
+Update the running summary of a conversation with the new turns below.
+Keep facts, decisions, numbers, the user's goals and open questions. Be concise.
+
+CURRENT SUMMARY:
+{self.summary or "(none)"}
+
+NEW TURNS:
+{transcript}
+"""
+        messages = [
+            {"role": "system", "content": "You maintain concise running summaries of conversations."},
+            {"role": "user", "content": prompt},
+        ]
+        future = submit_chat_completion(messages, api_key, model=SUMMARY_MODEL, max_tokens=SUMMARY_MAX_TOKENS)
+        self._pending = (future, self.summarized + fold)
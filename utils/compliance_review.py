@@ -0,0 +1,114 @@
+"""
+Map-reduce review of long AI policy documents.
+
+Policies that fit in SINGLE_PASS_TOKENS are reviewed with one prompt. Longer
+ones are split into token-budgeted sections that are reviewed concurrently
+against the same rubric (map), and the section findings are then merged into
+the usual Strengths / Weaknesses / Recommendations report (reduce). Latency
+follows the slowest section instead of the length of the whole document.
+"""
+from concurrent.futures import as_completed
+
+from utils.llm import build_messages, submit_chat_completion
+from utils.retrieval import chunk_text, count_tokens
+
+SINGLE_PASS_TOKENS = 12000
+SECTION_TOKENS = 4000
+SECTION_OVERLAP = 200
+
+SYSTEM_PROMPT = "You are an expert AI Ethics Officer."
+
+RUBRIC = """
+Check it thoroughly against the principles of:
+- **Fairness:** Does the policy address potential biases in AI models and data?
+- **Transparency:** Does it explain how AI decisions are made and when AI is being used?
+- **GDPR Compliance:** Does it align with data protection, consent, and user rights under GDPR?
+- **EU AI Act Guidelines:** Does it consider risk classification and requirements for high-risk AI systems as outlined in the EU AI Act?
+"""
+
+REPORT_FORMAT = """
+Provide your analysis in the following structured format:
+
+### 1. Strengths of this Policy
+* (List the positive aspects and well-addressed points here)
+
+### 2. Weaknesses & Potential Risks
+* (List the gaps, ambiguities, or areas that pose a compliance or ethical risk)
+
+### 3. Actionable Recommendations
+* (Provide clear, specific suggestions to improve the policy and mitigate risks)
+
+Use clear and concise business language suitable for an executive audience.
+"""
+
+
+def needs_map_reduce(policy_text):
+    return count_tokens(policy_text) > SINGLE_PASS_TOKENS
+
+
+def build_review_prompt(policy_text):
+    return f"""
+Please review the following company AI policy draft.
+{RUBRIC}
+{REPORT_FORMAT}
+---
+**POLICY DRAFT:**
+{policy_text}
+---
+"""
+
+
+def build_section_prompt(section, number, total):
+    return f"""
+You are reviewing section {number} of {total} of a longer company AI policy draft.
+{RUBRIC}
+Report only what this section shows. Do not flag topics as missing, because
+they may be covered in other sections. Answer with three short bullet lists
+titled "Strengths", "Weaknesses & Risks" and "Recommendations".
+
+---
+**POLICY SECTION {number}/{total}:**
+{section}
+---
+"""
+
+
+def build_merge_prompt(section_findings):
+    findings = "\n\n".join(
+        f"#### Findings for section {i}\n{text}" for i, text in enumerate(section_findings, start=1)
+    )
+    return f"""
+The following are findings from a section-by-section review of one company AI policy draft.
+Merge them into a single review of the whole policy: remove duplicates, resolve
+contradictions between sections, and judge which principles are missing from the
+policy as a whole.
+{RUBRIC}
+{REPORT_FORMAT}
+---
+{findings}
+---
+"""
+
+
+def split_sections(policy_text, section_tokens=SECTION_TOKENS, overlap=SECTION_OVERLAP):
+    return chunk_text(policy_text, section_tokens, overlap)
+
+
+def review_sections(sections, api_key, on_progress=None):
+    """
+    Reviews all sections concurrently and returns their findings in section
+    order. on_progress(done, total) is called as each section completes.
+    Raises the first error encountered.
+    """
+    futures = {
+        submit_chat_completion(
+            build_messages(SYSTEM_PROMPT, build_section_prompt(section, i, len(sections))), api_key, cache=True
+        ): i
+        for i, section in enumerate(sections, start=1)
+    }
+    findings = {}
+    for done, future in enumerate(as_completed(futures), start=1):
+        findings[futures[future]] = future.result()
+        if on_progress:
+            on_progress(done, len(futures))
+    return [findings[i] for i in sorted(findings)]
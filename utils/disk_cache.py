@@ -0,0 +1,121 @@
+"""
+Shared helpers for on-disk caches under user_data/.
+
+write_atomic() writes through a temp file unique to the process and thread
+and renames it into place, so concurrent sessions never see a partial file.
+DiskLRU keeps a directory of cache files under a byte limit, evicting the
+least recently used ones (by mtime, which reads refresh with touch()).
+"""
+import os
+import threading
+
+EVICT_TO = 0.9  # Evict down to this share of the limit, so not every write triggers a scan
+
+
+def write_atomic(path, write):
+    """
+    Calls write(tmp_path) and moves the result to `path` in one step.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class DiskLRU:
+    """
+    Size-bounded cache directory. The total size is scanned once and then
+    tracked as files are written and removed through this object.
+    """
+
+    def __init__(self, directory, max_bytes, suffix):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._bytes = None
+        self._lock = threading.Lock()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def touch(self, path):
+        """
+        Marks a file as recently used.
+        """
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def write(self, path, data):
+        """
+        Atomically writes bytes or text to `path`, then evicts if the directory
+        is over its limit. Returns the number of files evicted.
+        """
+        mode, encoding = ("wb", None) if isinstance(data, bytes) else ("w", "utf-8")
+
+        def write(tmp_path):
+            with open(tmp_path, mode, encoding=encoding) as f:
+                f.write(data)
+
+        write_atomic(path, write)
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes += len(data if isinstance(data, bytes) else data.encode("utf-8"))
+        return self.evict_if_needed()
+
+    def remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes -= size
+
+    def _scan(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.suffix):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+        return entries
+
+    def evict_if_needed(self):
+        """
+        Deletes least recently used files once the directory is over
+        max_bytes, down to EVICT_TO of it. Returns the number of files evicted.
+        """
+        with self._lock:
+            known = self._bytes
+        if known is not None and known <= self.max_bytes:
+            return 0
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        if total > self.max_bytes:
+            target = self.max_bytes * EVICT_TO
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                evicted += 1
+        with self._lock:
+            self._bytes = total
+        return evicted
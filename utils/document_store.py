@@ -0,0 +1,212 @@
+"""
+Persistent store for uploaded documents, keyed by the SHA-256 of their bytes.
+
+Extracted text and derived retrieval data (chunks, embeddings, FAISS index)
+are written under user_data/doc_store/<sha256>/ so the same file is parsed
+and embedded only once, whoever uploads it. Within a process, results are
+also memoized with st.cache_data / st.cache_resource, so widget reruns never
+touch the disk. The store is trimmed to DOC_STORE_MAX_BYTES by evicting the
+least recently used documents; documents that were used within the last
+DOC_STORE_MIN_IDLE seconds, or that still hold temporary files from a write
+in progress, are never evicted.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import streamlit as st
+
+from utils.disk_cache import write_atomic
+from utils.lazy import lazy_import
+from utils.llm import EMBEDDING_MODEL
+from utils.paths import ensure_data_dir
+from utils.pdf_extract import count_pages, iter_document_pages
+from utils.retrieval import CHUNK_OVERLAP, CHUNK_TOKENS, DocumentIndex
+
+faiss = lazy_import("faiss")
+
+MAX_BYTES = int(os.getenv("DOC_STORE_MAX_BYTES", str(500 * 1024 * 1024)))
+MIN_IDLE_SECONDS = float(os.getenv("DOC_STORE_MIN_IDLE", "600"))
+
+
+def document_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _store_dir():
+    return ensure_data_dir("doc_store")
+
+
+def _document_dir(doc_hash):
+    path = os.path.join(_store_dir(), doc_hash)
+    os.makedirs(path, exist_ok=True)
+    # Directory mtime doubles as the last-used time for eviction
+    os.utime(path)
+    return path
+
+
+def _dir_usage(path):
+    """
+    Returns (total size, last modified time, whether a write is in progress)
+    for a document directory.
+    """
+    total, last_used, writing = 0, os.path.getmtime(path), False
+    for root, dirs, files in os.walk(path):
+        for name in dirs + files:
+            try:
+                info = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            last_used = max(last_used, info.st_mtime)
+            if name in files:
+                total += info.st_size
+                writing = writing or name.endswith(".tmp")
+    return total, last_used, writing
+
+
+def evict_documents(max_bytes=MAX_BYTES, keep=None, min_idle=MIN_IDLE_SECONDS):
+    """
+    Deletes least recently used documents until the store fits in max_bytes.
+    Documents used within the last `min_idle` seconds or with a write in
+    progress are skipped, since another session may still be building them.
+    """
+    root = _store_dir()
+    entries = []
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if os.path.isdir(path):
+            try:
+                size, last_used, writing = _dir_usage(path)
+            except OSError:
+                continue
+            entries.append((last_used, size, writing, name, path))
+    total = sum(size for _, size, _, _, _ in entries)
+    cutoff = time.time() - min_idle
+    for last_used, size, writing, name, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if name == keep or writing or last_used > cutoff:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+
+def _text_path(doc_hash):
+    return os.path.join(_document_dir(doc_hash), "text.txt")
+
+
+def _index_dir(doc_hash, chunk_tokens, overlap, model):
+    return os.path.join(_document_dir(doc_hash), f"index_{model}_{chunk_tokens}_{overlap}")
+
+
+def _index_files(index_dir):
+    return (
+        os.path.join(index_dir, "chunks.json"),
+        os.path.join(index_dir, "embeddings.npy"),
+        os.path.join(index_dir, "index.faiss"),
+    )
+
+
+def has_text(doc_hash):
+    return os.path.exists(_text_path(doc_hash))
+
+
+def has_index(doc_hash, chunk_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP, model=EMBEDDING_MODEL):
+    return all(os.path.exists(p) for p in _index_files(_index_dir(doc_hash, chunk_tokens, overlap, model)))
+
+
+def _save_text(doc_hash, text):
+    def write(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+    write_atomic(_text_path(doc_hash), write)
+    evict_documents(keep=doc_hash)
+
+
+def iter_pages(doc_hash, data, mime_type, on_progress=None):
+    """
+    Yields the document's page texts, from the stored text if there is one,
+    otherwise by parsing the upload and storing the text once every page is in.
+    on_progress(done, total) is called after each page.
+    """
+    if has_text(doc_hash):
+        with open(_text_path(doc_hash), encoding="utf-8") as f:
+            text = f.read()
+        if on_progress:
+            on_progress(1, 1)
+        yield text
+        return
+
+    total = count_pages(data, mime_type)
+    pages = []
+    for page_text in iter_document_pages(data, mime_type):
+        pages.append(page_text)
+        if on_progress:
+            on_progress(len(pages), total)
+        yield page_text
+    _save_text(doc_hash, "\n".join(pages))
+
+
+def ensure_text(doc_hash, data, mime_type, on_progress=None):
+    """
+    Extracts and stores the document's text unless it is already stored.
+    """
+    for _ in iter_pages(doc_hash, data, mime_type, on_progress):
+        pass
+
+
+def ensure_index(doc_hash, data, mime_type, api_key, on_progress=None, chunk_tokens=CHUNK_TOKENS,
+                 overlap=CHUNK_OVERLAP, model=EMBEDDING_MODEL):
+    """
+    Builds and stores the document's retrieval index unless it is already
+    stored. Chunking and embedding start while later pages are still being parsed.
+    """
+    if has_index(doc_hash, chunk_tokens, overlap, model):
+        return
+    pages = iter_pages(doc_hash, data, mime_type, on_progress)
+    doc_index = DocumentIndex.from_pages(pages, api_key, chunk_tokens, overlap, model=model)
+
+    index_dir = _index_dir(doc_hash, chunk_tokens, overlap, model)
+    os.makedirs(index_dir, exist_ok=True)
+    chunks_path, embeddings_path, faiss_path = _index_files(index_dir)
+
+    def write_chunks(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(doc_index.chunks, f)
+
+    def write_embeddings(tmp_path):
+        with open(tmp_path, "wb") as f:
+            np.save(f, doc_index.embeddings)
+
+    write_atomic(chunks_path, write_chunks)
+    write_atomic(embeddings_path, write_embeddings)
+    write_atomic(faiss_path, lambda tmp_path: faiss.write_index(doc_index.index, tmp_path))
+    evict_documents(keep=doc_hash)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def get_document_text(doc_hash, _data, mime_type):
+    """
+    Returns the document's text, extracting it only if no earlier upload of
+    the same bytes has been stored.
+    """
+    ensure_text(doc_hash, _data, mime_type)
+    with open(_text_path(doc_hash), encoding="utf-8") as f:
+        return f.read()
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def get_document_index(doc_hash, _data, mime_type, _api_key, chunk_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP,
+                       model=EMBEDDING_MODEL):
+    """
+    Returns the FAISS-backed DocumentIndex for a document, building and
+    persisting it on first use.
+    """
+    ensure_index(doc_hash, _data, mime_type, _api_key, chunk_tokens=chunk_tokens, overlap=overlap, model=model)
+    chunks_path, embeddings_path, faiss_path = _index_files(_index_dir(doc_hash, chunk_tokens, overlap, model))
+    with open(chunks_path, encoding="utf-8") as f:
+        chunks = json.load(f)
+    return DocumentIndex(chunks, np.load(embeddings_path), faiss.read_index(faiss_path))
@@ -0,0 +1,49 @@
+"""
+Deferred imports for heavy optional dependencies.
+
+    pd = lazy_import("pandas")
+
+binds a placeholder that imports the real module on first attribute access,
+so a page only pays for pandas, moviepy, PyPDF2, openai, faiss and friends
+when it actually uses them rather than on every cold page switch. After the
+first access the module is cached and attribute lookups are forwarded.
+"""
+import importlib
+import threading
+
+
+class LazyModule:
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            with self.__dict__["_lock"]:
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = importlib.import_module(self.__dict__["_name"])
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+
+def lazy_import(name):
+    """
+    Returns a LazyModule for `name`, e.g. "moviepy.editor".
+    """
+    return LazyModule(name)
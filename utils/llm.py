@@ -0,0 +1,338 @@
+"""
+Shared OpenAI client layer used by every page.
+
+One client per API key is cached with st.cache_resource, so all sessions reuse
+the same keep-alive connection pool instead of mutating the global `openai`
+module. Calls get explicit timeouts and retry 429/5xx/connection errors with
+jittered exponential backoff.
+
+Settings can be overridden with environment variables:
+OPENAI_BASE_URL, OPENAI_TIMEOUT, OPENAI_CONNECT_TIMEOUT, OPENAI_MAX_RETRIES,
+OPENAI_BACKOFF_BASE, OPENAI_BACKOFF_MAX, OPENAI_POOL_SIZE, OPENAI_WORKERS,
+OPENAI_BATCH_CONCURRENCY.
+"""
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+import random
+import threading
+import time
+import weakref
+
+import streamlit as st
+
+from utils.lazy import lazy_import
+from utils.response_cache import get_cache, make_key
+
+httpx = lazy_import("httpx")
+openai = lazy_import("openai")
+
+DEFAULT_MODEL = "gpt-4o"
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_BATCH_SIZE = 256
+
+BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "120"))
+CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "10"))
+MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "4"))
+BACKOFF_BASE = float(os.getenv("OPENAI_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("OPENAI_BACKOFF_MAX", "20"))
+POOL_SIZE = int(os.getenv("OPENAI_POOL_SIZE", "20"))
+WORKERS = int(os.getenv("OPENAI_WORKERS", "8"))
+BATCH_CONCURRENCY = int(os.getenv("OPENAI_BATCH_CONCURRENCY", "8"))
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+logger = logging.getLogger(__name__)
+
+
+def _timeout():
+    return httpx.Timeout(TIMEOUT, connect=CONNECT_TIMEOUT)
+
+
+def _limits():
+    return httpx.Limits(
+        max_connections=POOL_SIZE,
+        max_keepalive_connections=POOL_SIZE,
+        keepalive_expiry=60,
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_client(api_key):
+    """
+    Returns the process-wide OpenAI client for this API key. Retries are
+    handled here rather than by the SDK so the policy is the same for sync
+    and async calls.
+    """
+    return openai.OpenAI(
+        api_key=api_key,
+        base_url=BASE_URL,
+        max_retries=0,
+        timeout=_timeout(),
+        http_client=httpx.Client(timeout=_timeout(), limits=_limits()),
+    )
+
+
+# Async clients hold connections bound to the event loop that created them,
+# so keep one per (loop, key) and let it go away with the loop.
+_async_clients = weakref.WeakKeyDictionary()
+_async_clients_lock = threading.Lock()
+
+
+def get_async_client(api_key):
+    """
+    Returns an AsyncOpenAI client for the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        if api_key not in clients:
+            clients[api_key] = openai.AsyncOpenAI(
+                api_key=api_key,
+                base_url=BASE_URL,
+                max_retries=0,
+                timeout=_timeout(),
+                http_client=httpx.AsyncClient(timeout=_timeout(), limits=_limits()),
+            )
+        return clients[api_key]
+
+
+@st.cache_resource(show_spinner=False)
+def _background_loop():
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True).start()
+    return loop
+
+
+def submit_async(coro):
+    """
+    Schedules a coroutine on the shared background event loop and returns a
+    concurrent.futures.Future for its result.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop())
+
+
+@st.cache_resource(show_spinner=False)
+def get_executor():
+    """
+    Returns the shared thread pool used to run blocking API calls concurrently.
+    The sync client is thread-safe, so workers share its connection pool.
+    """
+    return ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="llm-worker")
+
+
+def submit_chat_completion(messages, api_key, model=DEFAULT_MODEL, **params):
+    """
+    Starts chat_completion on the shared thread pool and returns its Future.
+    """
+    return get_executor().submit(chat_completion, messages, api_key, model=model, **params)
+
+
+def is_retryable(error):
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS or error.status_code >= 500
+    return False
+
+
+def backoff_delay(attempt, error=None):
+    """
+    Full-jitter exponential backoff, honouring a Retry-After header if the
+    server sent one.
+    """
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def with_retries(fn, *args, **kwargs):
+    """
+    Calls fn, retrying transient API errors up to MAX_RETRIES times.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == MAX_RETRIES or not is_retryable(e):
+                raise
+            time.sleep(backoff_delay(attempt, e))
+
+
+# Monotonic time until which async calls hold off after a 429. All coroutines
+# run on the one background loop, so a plain module global is enough.
+_rate_limited_until = 0.0
+
+
+async def _wait_for_rate_limit():
+    delay = _rate_limited_until - time.monotonic()
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+def _note_rate_limit(delay):
+    global _rate_limited_until
+    _rate_limited_until = max(_rate_limited_until, time.monotonic() + delay)
+
+
+async def awith_retries(fn, *args, **kwargs):
+    """
+    Async counterpart of with_retries. A 429 pauses every async call, not just
+    the one that hit it, so a batch backs off together instead of each task
+    running into the limit on its own.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        await _wait_for_rate_limit()
+        try:
+            return await fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == MAX_RETRIES or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, e)
+            if getattr(e, "status_code", None) == 429:
+                _note_rate_limit(delay)
+            await asyncio.sleep(delay)
+
+
+def _cache_response(key, content):
+    try:
+        get_cache().set(key, content)
+    except Exception:
+        # The answer is already paid for; a full disk must not lose it
+        logger.exception("Response cache write failed")
+
+
+def build_messages(system_prompt, user_prompt):
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def chat_completion(messages, api_key, model=DEFAULT_MODEL, cache=False, **params):
+    """
+    Sends a chat completion request and returns the message text.
+    Raises on failure, which makes it safe to call from worker threads.
+    With cache=True, identical requests are answered from the response cache.
+    """
+    key = make_key(model, messages, params) if cache else None
+    if key:
+        cached = get_cache().get(key)
+        if cached is not None:
+            return cached
+    client = get_client(api_key)
+    response = with_retries(client.chat.completions.create, model=model, messages=messages, **params)
+    content = response.choices[0].message.content
+    if key and content:
+        _cache_response(key, content)
+    return content
+
+
+async def achat_completion(messages, api_key, model=DEFAULT_MODEL, cache=False, **params):
+    key = make_key(model, messages, params) if cache else None
+    if key:
+        cached = get_cache().get(key)
+        if cached is not None:
+            return cached
+    client = get_async_client(api_key)
+    response = await awith_retries(client.chat.completions.create, model=model, messages=messages, **params)
+    content = response.choices[0].message.content
+    if key and content:
+        _cache_response(key, content)
+    return content
+
+
+async def achat_completions(message_lists, api_key, model=DEFAULT_MODEL, cache=False,
+                            concurrency=BATCH_CONCURRENCY, on_result=None, **params):
+    """
+    Runs many chat completions with at most `concurrency` in flight and
+    returns their results in input order. A failed request yields its
+    exception instead of failing the batch. on_result(index, result) is called
+    on the event loop thread as each one finishes.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index, messages):
+        async with semaphore:
+            try:
+                result = await achat_completion(messages, api_key, model=model, cache=cache, **params)
+            except Exception as e:
+                result = e
+        if on_result:
+            on_result(index, result)
+        return result
+
+    return await asyncio.gather(*(run(i, messages) for i, messages in enumerate(message_lists)))
+
+
+def stream_chat_completion(messages, api_key, model=DEFAULT_MODEL, cache=False, **params):
+    """
+    Yields the response text as it arrives. The full text is assembled as the
+    stream is consumed and stored in the response cache when cache=True; a
+    cache hit is yielded in one piece. Raises on failure.
+    """
+    key = make_key(model, messages, params) if cache else None
+    if key:
+        cached = get_cache().get(key)
+        if cached is not None:
+            yield cached
+            return
+    client = get_client(api_key)
+    # Only opening the stream is retried; a failure mid-answer would duplicate tokens
+    stream = with_retries(client.chat.completions.create, model=model, messages=messages, stream=True, **params)
+    parts = []
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            parts.append(delta)
+            yield delta
+    if key and parts:
+        _cache_response(key, "".join(parts))
+
+
+def stream_openai_messages(messages, api_key, model=DEFAULT_MODEL, cache=False, **params):
+    """
+    Streams a reply to a full message list (e.g. a chat history) for
+    st.write_stream. Errors are shown on the page and end the stream.
+    """
+    try:
+        yield from stream_chat_completion(messages, api_key, model=model, cache=cache, **params)
+    except Exception as e:
+        st.error(f"OpenAI API Request Error: {e}")
+
+
+def stream_openai_api(system_prompt, user_prompt, api_key, model=DEFAULT_MODEL, cache=False, **params):
+    """
+    Streams a reply to a system/user prompt pair for st.write_stream, which
+    renders tokens as they arrive and returns the collected text. Errors are
+    shown on the page and end the stream.
+    """
+    yield from stream_openai_messages(build_messages(system_prompt, user_prompt), api_key, model=model, cache=cache, **params)
+
+
+def embed_batch(texts, api_key, model=EMBEDDING_MODEL):
+    """
+    Embeds texts in a single request. Returns one vector per input, in order.
+    """
+    response = with_retries(get_client(api_key).embeddings.create, model=model, input=texts)
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+def embed_texts(texts, api_key, model=EMBEDDING_MODEL, batch_size=EMBEDDING_BATCH_SIZE):
+    """
+    Embeds texts in batches, sending the batches concurrently on the shared
+    thread pool. Returns one vector (list of floats) per input, in order.
+    """
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    futures = [get_executor().submit(embed_batch, batch, api_key, model) for batch in batches]
+    return [vector for future in futures for vector in future.result()]
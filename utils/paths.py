@@ -0,0 +1,23 @@
+import os
+import re
+
+# Directory for user analytics and other per-user files
+DATA_DIR = "user_data"
+
+
+def ensure_data_dir(*parts):
+    """
+    Returns a directory under DATA_DIR, creating it if needed.
+    """
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def sanitize_username(username):
+    return re.sub(r'[^a-zA-Z0-9_]', '', username.lower())
+
+
+def get_user_data_file(username, data_type="analytics", ext="csv"):
+    ensure_data_dir()
+    return os.path.join(DATA_DIR, f"{sanitize_username(username)}_{data_type}.{ext}")
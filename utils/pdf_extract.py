@@ -0,0 +1,84 @@
+"""
+Page-wise text extraction for uploaded documents.
+
+Each PDF page is parsed exactly once. Small documents are read in-process;
+larger ones are split into page ranges that a process pool parses in
+parallel, while pages are still yielded in order as soon as their range is
+done, so callers can start chunking before the last page has been parsed.
+
+This module deliberately avoids importing streamlit so pool workers stay cheap
+to start.
+"""
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.lazy import lazy_import
+
+PyPDF2 = lazy_import("PyPDF2")
+
+PDF_MIME_TYPE = "application/pdf"
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+MAX_PROCESSES = int(os.getenv("PDF_MAX_PROCESSES", str(min(os.cpu_count() or 1, 8))))
+
+# Set once per worker process by _init_worker so the PDF bytes are not
+# pickled again for every page range
+_worker_reader = None
+
+
+def _init_worker(data):
+    global _worker_reader
+    _worker_reader = PyPDF2.PdfReader(io.BytesIO(data))
+
+
+def _extract_range(start, stop):
+    return [_worker_reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def count_pages(data, mime_type):
+    if mime_type != PDF_MIME_TYPE:
+        return 1
+    return len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+
+
+def iter_pdf_pages(data):
+    """
+    Yields the text of each page of a PDF, in page order.
+    """
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    page_count = len(reader.pages)
+
+    if page_count < PARALLEL_MIN_PAGES or MAX_PROCESSES < 2:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    # Spawned rather than forked: the Streamlit server process is multi-threaded
+    pool = ProcessPoolExecutor(
+        max_workers=min(MAX_PROCESSES, -(-page_count // PAGES_PER_TASK)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(data,),
+    )
+    try:
+        futures = [
+            pool.submit(_extract_range, start, min(start + PAGES_PER_TASK, page_count))
+            for start in range(0, page_count, PAGES_PER_TASK)
+        ]
+        for future in futures:
+            yield from future.result()
+    finally:
+        # Stop parsing the remaining ranges if the caller stops early
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_document_pages(data, mime_type):
+    """
+    Yields page texts for a PDF, or the whole decoded text for a text file.
+    """
+    if mime_type == PDF_MIME_TYPE:
+        yield from iter_pdf_pages(data)
+    else:
+        yield data.decode("utf-8")
@@ -0,0 +1,289 @@
+"""
+Per-topic question bank for the Quiz Generator.
+
+Generated questions are appended to user_data/quiz_bank/<topic hash>.jsonl,
+so a repeat topic is served from disk instantly and the bank is topped up in
+the background. New questions are streamed by a
+QuizJob: each item is parsed and validated as soon as it is complete, so the
+first question can be shown while the rest are still being generated. Quiz
+and top-up jobs run on their own small pool (QUIZ_WORKERS threads), so these
+long generations never queue ahead of the short calls other pages make on the
+shared LLM pool.
+
+Every question is embedded (vectors kept alongside in <topic hash>.npy) and
+added to a per-topic FAISS inner-product index over normalised vectors. A new
+question whose cosine similarity to any banked one reaches
+SIMILARITY_THRESHOLD is rejected as a near-duplicate, and the model is only
+asked again for the number of questions still missing. The embedding
+function is pluggable with set_embed_fn(); anything mapping a list of texts
+to a list of vectors works.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+import streamlit as st
+
+from utils.lazy import lazy_import
+from utils.llm import DEFAULT_MODEL, build_messages, embed_batch, stream_chat_completion
+from utils.paths import ensure_data_dir
+from utils.structured import QUIZ_ITEM, generate_items, iter_json_items
+
+faiss = lazy_import("faiss")
+
+BANK_TARGET = 30  # Questions per topic to keep in stock
+TOPUP_BATCH = 10
+AVOID_LIMIT = 40  # Existing questions listed in the prompt so they are not repeated
+SIMILARITY_THRESHOLD = float(os.getenv("QUIZ_DEDUP_THRESHOLD", "0.92"))
+MAX_FILL_ROUNDS = 2  # Follow-up requests for questions lost to validation or dedup
+QUIZ_WORKERS = int(os.getenv("QUIZ_WORKERS", "2"))
+
+SYSTEM_PROMPT = "You are an expert quiz designer."
+
+_banks = {}
+_banks_lock = threading.Lock()
+_topping_up = set()
+_embed_fn = None
+
+
+def normalize_topic(topic):
+    return re.sub(r"\s+", " ", topic).strip().lower()
+
+
+def _question_key(question):
+    return re.sub(r"\W+", " ", question["question"]).strip().lower()
+
+
+def _normalize(vectors):
+    vectors = np.array(vectors, dtype="float32", ndmin=2)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def set_embed_fn(embed_fn):
+    """
+    Overrides how questions are embedded, e.g. with a deterministic local
+    function in tests. Pass None to go back to the embeddings API.
+    """
+    global _embed_fn
+    _embed_fn = embed_fn
+
+
+@st.cache_resource(show_spinner=False)
+def get_quiz_executor():
+    """
+    Returns the pool that runs quiz and top-up jobs, kept apart from the
+    shared LLM pool so a burst of quizzes can't delay other pages' calls.
+    """
+    return ThreadPoolExecutor(max_workers=QUIZ_WORKERS, thread_name_prefix="quiz-job")
+
+
+def get_embed_fn(api_key):
+    # embed_batch rather than embed_texts: one quiz job embeds a handful of
+    # questions at a time, not worth fanning out on the shared LLM pool
+    return _embed_fn or partial(embed_batch, api_key=api_key)
+
+
+class TopicBank:
+    """
+    The questions of one topic plus their embeddings and FAISS index. The
+    index is only built (embedding any questions that lack a vector) the
+    first time a new question has to be checked against the bank.
+    """
+
+    def __init__(self, topic):
+        key = hashlib.sha256(normalize_topic(topic).encode("utf-8")).hexdigest()[:32]
+        directory = ensure_data_dir("quiz_bank")
+        self.questions_path = os.path.join(directory, f"{key}.jsonl")
+        self.embeddings_path = os.path.join(directory, f"{key}.npy")
+        self.lock = threading.RLock()
+        self.questions = []
+        if os.path.exists(self.questions_path):
+            with open(self.questions_path, encoding="utf-8") as f:
+                self.questions = [json.loads(line) for line in f if line.strip()]
+        self.keys = {_question_key(q) for q in self.questions}
+        self.embeddings = None
+        self.index = None
+
+    def _ensure_index(self, embed_fn, dimension):
+        if self.index is not None:
+            return
+        embeddings = np.load(self.embeddings_path) if os.path.exists(self.embeddings_path) else None
+        if embeddings is None or len(embeddings) > len(self.questions) or embeddings.shape[1] != dimension:
+            embeddings = np.zeros((0, dimension), dtype="float32")
+        missing = self.questions[len(embeddings):]
+        if missing:
+            embeddings = np.vstack([embeddings, _normalize(embed_fn([q["question"] for q in missing]))])
+            np.save(self.embeddings_path, embeddings)
+        self.embeddings = embeddings
+        self.index = faiss.IndexFlatIP(dimension)
+        self.index.add(embeddings)
+
+    def add(self, questions, embed_fn, threshold=SIMILARITY_THRESHOLD):
+        """
+        Adds the questions that are neither exact nor near-duplicates of banked
+        ones (or of each other) and returns them.
+        """
+        candidates = [q for q in questions if _question_key(q) not in self.keys]
+        if not candidates:
+            return []
+        vectors = _normalize(embed_fn([q["question"] for q in candidates]))
+
+        with self.lock:
+            self._ensure_index(embed_fn, vectors.shape[1])
+            added, added_vectors = [], []
+            for question, vector in zip(candidates, vectors):
+                key = _question_key(question)
+                if key in self.keys:
+                    continue
+                if self.index.ntotal:
+                    scores, _ = self.index.search(vector[None, :], 1)
+                    if scores[0][0] >= threshold:
+                        continue
+                self.index.add(vector[None, :])
+                self.questions.append(question)
+                self.keys.add(key)
+                added.append(question)
+                added_vectors.append(vector)
+            if added:
+                with open(self.questions_path, "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(q, ensure_ascii=False) + "\n" for q in added)
+                self.embeddings = np.vstack([self.embeddings, *added_vectors])
+                np.save(self.embeddings_path, self.embeddings)
+            return added
+
+
+def get_bank(topic):
+    key = normalize_topic(topic)
+    with _banks_lock:
+        if key not in _banks:
+            _banks[key] = TopicBank(topic)
+        return _banks[key]
+
+
+def load_questions(topic):
+    bank = get_bank(topic)
+    with bank.lock:
+        return list(bank.questions)
+
+
+def add_questions(topic, questions, embed_fn):
+    return get_bank(topic).add(questions, embed_fn)
+
+
+def build_quiz_messages(topic, count, avoid=()):
+    user_prompt = f"""
+    Generate {count} multiple-choice questions on '{topic}'.
+    For each, provide: 'question', a list of 'options', the 'correct_answer' (copied exactly from
+    the options), and a brief 'explanation'.
+    """
+    avoid = [q["question"] for q in avoid][-AVOID_LIMIT:]
+    if avoid:
+        listing = "\n".join(f"- {question}" for question in avoid)
+        user_prompt += f"\nDo not repeat or rephrase any of these existing questions:\n{listing}\n"
+    return build_messages(SYSTEM_PROMPT, user_prompt)
+
+
+class QuizJob:
+    """
+    Streams `count` new questions on a topic in a background thread. Each
+    valid question is checked against the topic bank as soon as it is parsed;
+    new ones are banked and appended to `questions`, which the page polls
+    with wait_for(). Questions lost to validation or dedup are re-requested
+    by number only.
+    """
+
+    def __init__(self, topic, count, api_key, avoid=(), model=DEFAULT_MODEL, embed_fn=None):
+        self.topic = topic
+        self.count = count
+        self.api_key = api_key
+        self.avoid = list(avoid)
+        self.model = model
+        self.embed_fn = embed_fn or get_embed_fn(api_key)
+        self.questions = []
+        self.error = None
+        self.done = False
+        self._changed = threading.Condition()
+        self.future = get_quiz_executor().submit(self._run)
+
+    def _offer(self, question):
+        if len(self.questions) >= self.count or QUIZ_ITEM.validate(question):
+            return
+        if add_questions(self.topic, [question], self.embed_fn):
+            with self._changed:
+                self.questions.append(question)
+                self._changed.notify_all()
+
+    def _run(self):
+        try:
+            messages = build_quiz_messages(self.topic, self.count, self.avoid)
+            text, position = "", 0
+            for delta in stream_chat_completion(
+                messages, self.api_key, model=self.model, response_format=QUIZ_ITEM.response_format()
+            ):
+                text += delta
+                for item, position in iter_json_items(text, position):
+                    self._offer(item)
+
+            for _ in range(MAX_FILL_ROUNDS):
+                missing = self.count - len(self.questions)
+                if missing <= 0:
+                    break
+                retry_messages = build_quiz_messages(self.topic, missing, load_questions(self.topic))
+                for item in generate_items(QUIZ_ITEM, retry_messages, missing, self.api_key, model=self.model):
+                    self._offer(item)
+        except Exception as e:
+            self.error = e
+        finally:
+            with self._changed:
+                self.done = True
+                self._changed.notify_all()
+
+    def wait_for(self, count, timeout=None):
+        """
+        Blocks until at least `count` questions are available or the job has
+        finished, and returns whether `count` questions are available.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.questions) >= count or self.done, timeout)
+            return len(self.questions) >= count
+
+
+def top_up(topic, api_key, target=BANK_TARGET, batch=TOPUP_BATCH):
+    """
+    Generates another batch of questions in the background if the topic's
+    bank holds fewer than `target`. At most one top-up per topic runs at a time.
+    """
+    key = normalize_topic(topic)
+    bank = load_questions(topic)
+    if len(bank) >= target:
+        return None
+    with _banks_lock:
+        if key in _topping_up:
+            return None
+        _topping_up.add(key)
+    job = QuizJob(topic, min(batch, target - len(bank)), api_key, avoid=bank)
+    job.future.add_done_callback(lambda _: _topping_up.discard(key))
+    return job
+
+
+def start_quiz(topic, count, api_key, rng=random):
+    """
+    Returns (questions, job): up to `count` questions drawn from the bank,
+    and a QuizJob streaming the remainder, or None if the bank had enough,
+    in which case the bank is topped up in the background.
+    """
+    bank = load_questions(topic)
+    questions = rng.sample(bank, min(count, len(bank)))
+    job = None
+    if len(questions) < count:
+        job = QuizJob(topic, count - len(questions), api_key, avoid=bank)
+    else:
+        top_up(topic, api_key)
+    return questions, job
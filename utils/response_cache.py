@@ -0,0 +1,110 @@
+"""
+Content-addressed cache for deterministic LLM responses.
+
+Entries are keyed on a SHA-256 of (model, messages, parameters). Lookups go
+through an in-memory LRU first, then an on-disk tier under user_data/llm_cache
+that expires entries after a TTL and evicts least recently used files once the
+directory grows past its size limit.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils.disk_cache import DiskLRU
+from utils.paths import ensure_data_dir
+
+MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+DISK_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL", str(24 * 3600)))
+
+
+def make_key(model, messages, params=None):
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, directory=None, memory_entries=MEMORY_ENTRIES,
+                 max_bytes=DISK_MAX_BYTES, ttl=TTL_SECONDS):
+        self.directory = directory or ensure_data_dir("llm_cache")
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = DiskLRU(self.directory, max_bytes, ".json")
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def _path(self, key):
+        return self._disk.path(key)
+
+    def _remember(self, key, value, created):
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[1] < self.ttl:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry[0]
+            self._memory.pop(key, None)
+
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+
+        if now - entry["created"] >= self.ttl:
+            self._disk.remove(path)
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+
+        self._disk.touch(path)
+        with self._lock:
+            self._remember(key, entry["response"], entry["created"])
+            self.stats["disk_hits"] += 1
+        return entry["response"]
+
+    def set(self, key, value):
+        created = time.time()
+        data = json.dumps({"created": created, "response": value}, ensure_ascii=False)
+        evicted = self._disk.write(self._path(key), data)
+        with self._lock:
+            self._remember(key, value, created)
+            self.stats["evictions"] += evicted
+
+    def hit_rate(self):
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return hits / lookups if lookups else 0.0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,108 @@
+"""
+Token-aware chunking and FAISS retrieval for document question answering.
+
+Documents are split into overlapping windows of CHUNK_TOKENS tokens, embedded
+in batches and stored in an inner-product FAISS index over normalised vectors
+(i.e. cosine similarity). A question only ever sends the TOP_K best chunks to
+the model, so prompt size no longer depends on document length.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from utils.lazy import lazy_import
+from utils.llm import DEFAULT_MODEL, EMBEDDING_BATCH_SIZE, EMBEDDING_MODEL, embed_batch, embed_texts, get_executor
+
+faiss = lazy_import("faiss")
+tiktoken = lazy_import("tiktoken")
+
+CHUNK_TOKENS = 400
+CHUNK_OVERLAP = 50
+TOP_K = 5
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model=DEFAULT_MODEL):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text, model=DEFAULT_MODEL):
+    return len(get_encoding(model).encode(text, disallowed_special=()))
+
+
+def iter_chunks(texts, chunk_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP, model=DEFAULT_MODEL):
+    """
+    Splits a stream of texts (e.g. PDF pages) into windows of at most
+    chunk_tokens tokens, each sharing `overlap` tokens with the previous one.
+    Chunks are yielded as soon as enough tokens have arrived.
+    """
+    encoding = get_encoding(model)
+    step = max(chunk_tokens - overlap, 1)
+    buffer = []
+    emitted = False
+    for text in texts:
+        if buffer:
+            buffer.extend(encoding.encode("\n"))
+        buffer.extend(encoding.encode(text, disallowed_special=()))
+        while len(buffer) >= chunk_tokens:
+            chunk = encoding.decode(buffer[:chunk_tokens]).strip()
+            if chunk:
+                yield chunk
+                emitted = True
+            buffer = buffer[step:]
+    # The tail only holds new tokens if it is longer than the overlap already emitted
+    if buffer and (not emitted or len(buffer) > overlap):
+        chunk = encoding.decode(buffer).strip()
+        if chunk:
+            yield chunk
+
+
+def chunk_text(text, chunk_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP, model=DEFAULT_MODEL):
+    return list(iter_chunks([text], chunk_tokens, overlap, model))
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype="float32")
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+class DocumentIndex:
+    def __init__(self, chunks, embeddings, index=None):
+        self.chunks = chunks
+        self.embeddings = _normalize(embeddings)
+        if index is None:
+            index = faiss.IndexFlatIP(self.embeddings.shape[1])
+            index.add(self.embeddings)
+        self.index = index
+
+    @classmethod
+    def from_pages(cls, pages, api_key, chunk_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP, model=EMBEDDING_MODEL,
+                   batch_size=EMBEDDING_BATCH_SIZE):
+        """
+        Builds an index from an iterable of page texts. Embedding batches are
+        sent as soon as they fill up, overlapping with extraction of later pages.
+        """
+        chunks, batch, futures = [], [], []
+        for chunk in iter_chunks(pages, chunk_tokens, overlap):
+            chunks.append(chunk)
+            batch.append(chunk)
+            if len(batch) == batch_size:
+                futures.append(get_executor().submit(embed_batch, batch, api_key, model))
+                batch = []
+        if batch:
+            futures.append(get_executor().submit(embed_batch, batch, api_key, model))
+        if not chunks:
+            raise ValueError("The document does not contain any text.")
+        return cls(chunks, [vector for future in futures for vector in future.result()])
+
+    def search(self, question, api_key, k=TOP_K, model=EMBEDDING_MODEL):
+        """
+        Returns up to k (score, chunk) pairs, best match first.
+        """
+        query = _normalize(embed_texts([question], api_key, model=model))
+        scores, ids = self.index.search(query, min(k, len(self.chunks)))
+        return [(float(score), self.chunks[i]) for score, i in zip(scores[0], ids[0]) if i >= 0]
@@ -0,0 +1,177 @@
+"""
+Batch mode for the Business Scenario Simulator.
+
+A list of "What if" scenarios, typed in, uploaded as CSV or expanded from a
+template such as "What if we cut the {region} budget by {cut}%?", is sent
+through achat_completions on the shared event loop, so a sweep takes about as
+long as its slowest call. Each answer is requested as a JSON object with fixed
+fields under a strict json_schema response format, which makes the results
+line up in one comparison table. Answers are still checked field by field, so
+one malformed answer only marks its own row as failed.
+"""
+import io
+import itertools
+import json
+import math
+import numbers
+import re
+import string
+
+from utils.lazy import lazy_import
+from utils.llm import achat_completions, build_messages, submit_async
+from utils.structured import ItemSchema
+
+pd = lazy_import("pandas")
+
+SYSTEM_PROMPT = "You are a strategic business advisor."
+MAX_SCENARIOS = 100
+
+# JSON field -> comparison table column
+RESULT_FIELDS = {
+    "financial_impact_short_term": "Financial impact (short term)",
+    "financial_impact_long_term": "Financial impact (long term)",
+    "risks": "Risks & challenges",
+    "customer_impact": "Customer impact",
+    "recommended_action": "Recommended executive action",
+    "impact_score": "Impact score (-5 to 5)",
+}
+
+
+def validate_scenario_result(item):
+    if not isinstance(item, dict):
+        return ["answer must be an object"]
+    problems = [
+        f"'{key}' must be a string" for key in RESULT_FIELDS
+        if key != "impact_score" and not isinstance(item.get(key), str)
+    ]
+    if pd.isna(impact_score(item.get("impact_score"))):
+        problems.append("'impact_score' must be a number")
+    return problems
+
+
+SCENARIO_RESULT = ItemSchema("scenario_analysis", {
+    "type": "object",
+    "properties": {key: {"type": "integer" if key == "impact_score" else "string"} for key in RESULT_FIELDS},
+    "required": list(RESULT_FIELDS),
+    "additionalProperties": False,
+}, validate_scenario_result)
+
+
+def build_batch_prompt(scenario):
+    fields = "\n".join(f'- "{key}": {label}' for key, label in RESULT_FIELDS.items())
+    return f"""
+Analyze the following "What if" scenario: {scenario}
+
+Answer with a JSON object with exactly these keys, each a concise string of
+one to three sentences, except "impact_score", which is an integer from -5
+(severely negative) to 5 (strongly positive) for the overall business impact:
+{fields}
+"""
+
+
+def parse_scenario_list(text):
+    return [line.strip(" -*\t") for line in text.splitlines() if line.strip(" -*\t")]
+
+
+def scenarios_from_csv(data):
+    """
+    Reads scenarios from a `scenario` column, or from the first column if
+    there is none.
+    """
+    df = pd.read_csv(io.BytesIO(data))
+    if df.empty:
+        return []
+    columns = {str(c).strip().lower(): c for c in df.columns}
+    column = columns.get("scenario", df.columns[0])
+    return [str(s).strip() for s in df[column].dropna() if str(s).strip()]
+
+
+def expand_template(template, variables_text, max_scenarios=MAX_SCENARIOS):
+    """
+    Expands a template with {name} placeholders over every combination of the
+    values given as `name: value, value, ...` lines. Raises ValueError for a
+    malformed template or one that expands to more than max_scenarios.
+    """
+    variables = {}
+    for line in variables_text.splitlines():
+        name, _, values = line.partition(":")
+        if name.strip():
+            variables[name.strip()] = [v.strip() for v in values.split(",") if v.strip()]
+
+    # Formatter.parse skips escaped {{braces}}, which a regex would mistake for placeholders
+    fields = [field for _, field, _, _ in string.Formatter().parse(template) if field is not None]
+    invalid = [field for field in fields if not re.fullmatch(r"[^\W\d]\w*", field)]
+    if invalid:
+        raise ValueError(
+            f"The template can only use named placeholders such as {{region}}, not: "
+            f"{', '.join('{' + field + '}' for field in invalid)}"
+        )
+    placeholders = list(dict.fromkeys(fields))
+    missing = [name for name in placeholders if not variables.get(name)]
+    if missing:
+        raise ValueError(f"No values given for: {', '.join(missing)}")
+    count = math.prod(len(variables[name]) for name in placeholders)
+    if count > max_scenarios:
+        raise ValueError(f"The template expands to {count} scenarios; please keep it to at most {max_scenarios}.")
+
+    combinations = itertools.product(*(variables[name] for name in placeholders))
+    try:
+        return [template.format(**dict(zip(placeholders, combination))) for combination in combinations]
+    except (IndexError, KeyError, AttributeError) as e:
+        # e.g. a placeholder nested in a format spec, "{cut:{width}}"
+        raise ValueError(f"The template can only use named placeholders such as {{region}} ({e!r}).") from e
+
+
+def submit_batch(scenarios, api_key, progress):
+    """
+    Starts the batch on the shared event loop and returns a Future for the
+    list of answers. Indexes of finished scenarios are appended to `progress`
+    as they complete, so the script thread can poll it for a progress bar.
+    """
+    message_lists = [build_messages(SYSTEM_PROMPT, build_batch_prompt(s)) for s in scenarios]
+    return submit_async(achat_completions(
+        message_lists, api_key, cache=True, on_result=lambda index, _: progress.append(index),
+        response_format=SCENARIO_RESULT.object_format(),
+    ))
+
+
+def impact_score(value):
+    """
+    The score as a float, or NaN unless the model returned a single number
+    (or numeric string).
+    """
+    if isinstance(value, bool) or not isinstance(value, (numbers.Real, str)):
+        return float("nan")
+    return float(pd.to_numeric(value, errors="coerce"))
+
+
+def parse_result(result):
+    """
+    Maps one answer (text or exception) to a row of the comparison table.
+    Fields of the wrong type are left blank and reported in the Error column.
+    """
+    if isinstance(result, Exception):
+        return {"Error": str(result)}
+    try:
+        data = json.loads(result)
+    except (TypeError, ValueError):
+        data = None
+    if not isinstance(data, dict):
+        return {"Error": "The response was not a valid JSON object."}
+    row = {
+        label: data.get(key) if isinstance(data.get(key), str) else None
+        for key, label in RESULT_FIELDS.items()
+    }
+    row[RESULT_FIELDS["impact_score"]] = impact_score(data.get("impact_score"))
+    problems = SCENARIO_RESULT.validate(data)
+    if problems:
+        row["Error"] = "; ".join(problems)
+    return row
+
+
+def comparison_table(scenarios, results):
+    rows = [{"Scenario": scenario, **parse_result(result)} for scenario, result in zip(scenarios, results)]
+    table = pd.DataFrame(rows, columns=["Scenario", *RESULT_FIELDS.values(), "Error"])
+    if table["Error"].isna().all():
+        table = table.drop(columns="Error")
+    return table
@@ -0,0 +1,151 @@
+"""
+Local skill-gap analytics for the Skill Gap Analyzer.
+
+Coverage, readiness tiers and gap rankings are computed from the aggregate
+produced by utils.skills against a target AI-skill taxonomy, with vectorised
+pandas/NumPy operations, so the heatmap is deterministic and renders without
+a model call. The LLM is only asked for the narrative recommendations.
+
+A taxonomy maps each target skill to the normalised skill names that count
+towards it. Because the aggregate only keeps per-skill counts, a group's
+coverage of a target skill is the largest share among its aliases, a lower
+bound on the share of employees holding any of them.
+"""
+import numpy as np
+
+from utils.lazy import lazy_import
+from utils.skills import normalize_skills
+
+pd = lazy_import("pandas")
+sns = lazy_import("seaborn")
+figure = lazy_import("matplotlib.figure")
+
+DEFAULT_TAXONOMY = {
+    "Generative AI": ["generative ai", "large language models", "prompt engineering", "chatgpt", "openai"],
+    "Machine Learning": ["machine learning", "scikit-learn", "deep learning", "tensorflow", "pytorch"],
+    "Data Analysis": ["data analysis", "statistics", "sql", "pandas", "excel", "power bi", "tableau"],
+    "Programming": ["python", "r", "java", "javascript"],
+    "Data Engineering": ["data engineering", "etl", "spark", "airflow", "databricks"],
+    "NLP": ["natural language processing", "text mining"],
+    "Computer Vision": ["computer vision", "image processing"],
+    "MLOps & Cloud": ["mlops", "aws", "azure", "gcp", "docker", "kubernetes"],
+    "AI Ethics & Governance": ["ai ethics", "responsible ai", "data privacy", "gdpr", "ai governance"],
+}
+
+TARGET_COVERAGE = 0.5  # Share of a department expected to hold each target skill
+READINESS_TIERS = ("Low", "Medium", "High")
+READINESS_THRESHOLDS = (0.3, 0.6)  # Readiness score cut-offs for Medium and High
+
+
+def format_taxonomy(taxonomy):
+    return "\n".join(f"{target}: {', '.join(aliases)}" for target, aliases in taxonomy.items())
+
+
+def parse_taxonomy(text):
+    """
+    Parses one `Target skill: alias, alias, ...` line per target skill. The
+    target name itself always counts as an alias.
+    """
+    taxonomy = {}
+    for line in text.splitlines():
+        target, _, aliases = line.partition(":")
+        target = target.strip()
+        if not target:
+            continue
+        names = [target] + [a for a in aliases.split(",") if a.strip()]
+        taxonomy[target] = list(dict.fromkeys(normalize_skills(pd.Series(names, dtype=object))))
+    return taxonomy
+
+
+def department_totals(headcount, counts):
+    return headcount.groupby(level="department").sum(), counts.groupby(level="department").sum()
+
+
+def coverage_matrix(headcount, counts, taxonomy):
+    """
+    Returns a department x target-skill DataFrame of coverage shares in [0, 1].
+    """
+    headcount, counts = department_totals(headcount, counts)
+    shares = counts.div(headcount.clip(lower=1), axis=0)
+    aliases = {alias for names in taxonomy.values() for alias in names}
+    shares = shares.loc[:, shares.columns.isin(aliases)]
+
+    targets = list(taxonomy)
+    # Alias membership as a skills x targets 0/1 matrix, so the max over
+    # aliases is one broadcast instead of a loop per target
+    membership = pd.DataFrame(
+        {target: shares.columns.isin(taxonomy[target]) for target in targets}, index=shares.columns
+    ).to_numpy()
+    values = shares.to_numpy()[:, :, None] * membership[None, :, :]
+    coverage = values.max(axis=1) if values.shape[1] else np.zeros((len(shares), len(targets)))
+    return pd.DataFrame(coverage.clip(0, 1), index=shares.index, columns=targets)
+
+
+def readiness(coverage, headcount, target=TARGET_COVERAGE):
+    """
+    Scores each department by how close its coverage is to the target on
+    average, and assigns a High/Medium/Low readiness tier.
+    """
+    score = (coverage / target).clip(upper=1).mean(axis=1)
+    tier_index = np.searchsorted(READINESS_THRESHOLDS, score.to_numpy(), side="right")
+    return pd.DataFrame({
+        "Headcount": headcount.groupby(level="department").sum().reindex(coverage.index).astype(int),
+        "Readiness score": score.round(2),
+        "Readiness": np.array(READINESS_TIERS)[tier_index],
+    }).sort_values("Readiness score", ascending=False)
+
+
+def rank_gaps(coverage, headcount, target=TARGET_COVERAGE, top_n=None):
+    """
+    Ranks (department, target skill) pairs by the number of employees that
+    would need training to reach the target coverage.
+    """
+    department_headcount = headcount.groupby(level="department").sum().reindex(coverage.index)
+    shortfall = (target - coverage).clip(lower=0)
+    to_train = np.ceil(shortfall.mul(department_headcount, axis=0).round(6))
+    gaps = pd.DataFrame({
+        "Coverage": coverage.stack(),
+        "Shortfall": shortfall.stack(),
+        "Employees to train": to_train.stack().astype(int),
+    })
+    gaps.index.names = ["Department", "Skill"]
+    gaps = gaps[gaps["Employees to train"] > 0].sort_values(["Employees to train", "Shortfall"], ascending=False)
+    return gaps.head(top_n) if top_n else gaps
+
+
+def plot_coverage_heatmap(coverage):
+    """
+    Draws the department x target-skill coverage heatmap. Uses a Figure
+    directly rather than pyplot so concurrent sessions don't share state.
+    """
+    fig = figure.Figure(figsize=(max(6, 1.1 * coverage.shape[1]), max(3, 0.5 * coverage.shape[0] + 1.5)))
+    ax = fig.subplots()
+    sns.heatmap(
+        coverage * 100, ax=ax, annot=True, fmt=".0f", vmin=0, vmax=100, cmap="RdYlGn",
+        linewidths=0.5, cbar_kws={"label": "% of employees"},
+    )
+    ax.set_xlabel("")
+    ax.set_ylabel("")
+    ax.tick_params(axis="x", labelrotation=35)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
+    fig.tight_layout()
+    return fig
+
+
+def summarize_for_prompt(readiness_table, gaps):
+    """
+    Encodes the computed readiness and top gaps as compact text for the
+    recommendation prompt.
+    """
+    lines = ["Department readiness (score 0-1, tier):"]
+    lines += [
+        f"- {department}: {row['Readiness score']:.2f} {row['Readiness']} (n={int(row['Headcount'])})"
+        for department, row in readiness_table.iterrows()
+    ]
+    lines.append("Largest skill gaps (department | skill | current coverage | employees to train):")
+    lines += [
+        f"- {department} | {skill} | {row['Coverage']:.0%} | {int(row['Employees to train'])}"
+        for (department, skill), row in gaps.iterrows()
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,257 @@
+"""
+Skill matrix preprocessing for the Skill Gap Analyzer.
+
+An HR export is reduced to per-department/role skill frequencies before
+anything is sent to the model: skill tokens are split, normalised and
+de-duplicated, counted with vectorised pandas group-bys, and encoded as one
+compact line per group. The prompt then grows with departments x skills, not
+with headcount.
+
+Uploads are read with aggregate_csv(), which parses the file in chunks with
+only the mapped columns and categorical dtypes, so memory stays bounded by the
+number of distinct employees and skills rather than by the file size.
+"""
+import hashlib
+import io
+import re
+
+import streamlit as st
+
+from utils.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+DEPARTMENT_COLUMNS = ("department", "dept", "team", "division", "business unit", "function", "unit")
+ROLE_COLUMNS = ("role", "job title", "title", "position", "job", "designation")
+SKILL_COLUMNS = ("skills", "skill", "skill set", "skillset", "competencies", "competency", "expertise")
+EMPLOYEE_COLUMNS = ("employee id", "employee_id", "emp id", "id", "employee", "name", "employee name")
+
+SKILL_SEPARATORS = r"\s*[;,|/\n]\s*"
+SKILL_ALIASES = {
+    "ai": "artificial intelligence",
+    "genai": "generative ai",
+    "gen ai": "generative ai",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "cv": "computer vision",
+    "llm": "large language models",
+    "llms": "large language models",
+    "py": "python",
+    "python3": "python",
+    "powerbi": "power bi",
+    "ms excel": "excel",
+    "microsoft excel": "excel",
+    "stats": "statistics",
+    "data viz": "data visualization",
+    "data visualisation": "data visualization",
+}
+
+UNASSIGNED = "Unassigned"
+ALL_ROLES = "All roles"
+MAX_GROUPS = 60
+TOP_SKILLS_PER_GROUP = 15
+MIN_SHARE = 0.05
+CSV_CHUNK_ROWS = 50_000
+PREVIEW_ROWS = 5
+
+
+def _match_column(columns, candidates):
+    normalized = {re.sub(r"[\s_]+", " ", str(c)).strip().lower(): c for c in columns}
+    for candidate in candidates:
+        if candidate in normalized:
+            return normalized[candidate]
+    for candidate in candidates:
+        for name, original in normalized.items():
+            if candidate in name:
+                return original
+    return None
+
+
+def detect_schema(columns):
+    """
+    Guesses which columns hold the department, role, skills and employee id.
+    Missing optional columns map to None.
+    """
+    remaining = list(columns)
+    schema = {}
+    for field, candidates in (("skills", SKILL_COLUMNS), ("department", DEPARTMENT_COLUMNS),
+                              ("role", ROLE_COLUMNS), ("employee", EMPLOYEE_COLUMNS)):
+        schema[field] = _match_column(remaining, candidates)
+        if schema[field] is not None:
+            remaining.remove(schema[field])
+    return schema
+
+
+def normalize_skills(series):
+    """
+    Maps a Series of raw skill tokens to canonical lower-case names.
+    Each distinct token is normalised once.
+    """
+    codes, uniques = pd.factorize(series.astype(str))
+    skills = (
+        pd.Series(uniques, dtype=object)
+        .str.lower()
+        .str.replace(r"[^\w\s+#.&-]", " ", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip(" .-")
+        .replace(SKILL_ALIASES)
+    )
+    return pd.Series(skills.to_numpy()[codes], index=series.index, dtype=object)
+
+
+def _labels(column, default):
+    """
+    Stripped string labels, with blank and missing cells mapped to `default`
+    so those rows keep a group instead of being dropped by the group-bys.
+    """
+    labels = column.astype(object).fillna("").astype(str).str.strip()
+    return labels.mask(labels == "", default)
+
+
+def _group_frame(df, schema):
+    department = schema.get("department")
+    role = schema.get("role")
+    frame = pd.DataFrame({
+        "department": _labels(df[department], UNASSIGNED) if department else UNASSIGNED,
+        "role": _labels(df[role], ALL_ROLES) if role else ALL_ROLES,
+        "skills": df[schema["skills"]],
+    }, index=df.index)
+    employee = schema.get("employee")
+    rows = pd.Series(df.index.astype(str), index=df.index)
+    # A row without an employee id still counts as one employee
+    frame["employee"] = _labels(df[employee], "").mask(lambda ids: ids == "", "row " + rows) if employee else rows
+    return frame
+
+
+def _skill_pairs(frame):
+    """
+    Returns the distinct (department, role, employee, skill) rows of a group frame.
+    """
+    frame = frame[frame["skills"].notna()]
+    exploded = (
+        frame.assign(skill=frame["skills"].astype(str).str.split(SKILL_SEPARATORS, regex=True))
+        .explode("skill")
+    )
+    exploded["skill"] = normalize_skills(exploded["skill"])
+    exploded = exploded[exploded["skill"].str.len() > 0]
+    return exploded[["department", "role", "employee", "skill"]].drop_duplicates()
+
+
+def _aggregate_pairs(members, pairs):
+    headcount = members.groupby(["department", "role"], observed=True)["employee"].nunique()
+    counts = (
+        pairs.groupby(["department", "role", "skill"], observed=True).size()
+        .unstack(fill_value=0)
+        .reindex(headcount.index, fill_value=0)
+    )
+    return headcount, counts
+
+
+def aggregate_skills(df, schema):
+    """
+    Returns (headcount, counts): headcount per (department, role), and the
+    number of distinct employees in each group holding each skill.
+    """
+    if not schema.get("skills"):
+        raise ValueError("Could not find a skills column in the uploaded file.")
+
+    frame = _group_frame(df, schema)
+    return _aggregate_pairs(frame, _skill_pairs(frame))
+
+
+def _compact(frame):
+    return frame.drop_duplicates().astype("category")
+
+
+def aggregate_csv(source, schema, chunksize=CSV_CHUNK_ROWS):
+    """
+    Same as aggregate_skills(), but reads a CSV file or buffer in chunks.
+
+    Without an employee column every row is one employee, so per-chunk
+    aggregates are summed. With one, an employee's rows may span chunks
+    (e.g. one row per skill), so the distinct memberships and skill pairs are
+    kept as categoricals and counted once at the end.
+    """
+    if not schema.get("skills"):
+        raise ValueError("Could not find a skills column in the uploaded file.")
+
+    columns = [c for c in dict.fromkeys(schema.values()) if c]
+    dtypes = {c: "category" for c in columns}
+    if schema.get("employee"):
+        dtypes[schema["employee"]] = str
+    reader = pd.read_csv(source, usecols=columns, dtype=dtypes, chunksize=chunksize)
+
+    if not schema.get("employee"):
+        # Chunks keep a running row index, so row numbers stay unique employee ids
+        parts = [aggregate_skills(chunk, schema) for chunk in reader]
+        if not parts:
+            raise ValueError("The uploaded file has no rows.")
+        return merge_aggregates(parts)
+
+    members, pairs = [], []
+    for chunk in reader:
+        frame = _group_frame(chunk, schema)
+        members.append(_compact(frame[["department", "role", "employee"]]))
+        pairs.append(_compact(_skill_pairs(frame)))
+    if not members:
+        raise ValueError("The uploaded file has no rows.")
+    return _aggregate_pairs(
+        _compact(pd.concat(members, ignore_index=True)), _compact(pd.concat(pairs, ignore_index=True))
+    )
+
+
+def upload_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def read_preview(file_hash, _data, rows=PREVIEW_ROWS):
+    return pd.read_csv(io.BytesIO(_data), nrows=rows)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_skill_aggregate(file_hash, _data, schema):
+    """
+    Aggregates an uploaded CSV once per (file, column mapping).
+    """
+    return aggregate_csv(io.BytesIO(_data), schema)
+
+
+def merge_aggregates(parts):
+    """
+    Sums (headcount, counts) pairs computed over separate slices of a file.
+    """
+    headcounts = [h for h, _ in parts]
+    counts = [c for _, c in parts]
+    headcount = pd.concat(headcounts).groupby(level=[0, 1]).sum()
+    merged = pd.concat(counts).fillna(0).groupby(level=[0, 1]).sum().astype(int)
+    return headcount, merged.reindex(headcount.index, fill_value=0)
+
+
+def collapse_roles(headcount, counts):
+    """
+    Rolls roles up into their department, keeping one row per department.
+    """
+    headcount = headcount.groupby(level=0).sum()
+    counts = counts.groupby(level=0).sum()
+    headcount.index = pd.MultiIndex.from_arrays([headcount.index, [ALL_ROLES] * len(headcount)], names=["department", "role"])
+    counts.index = headcount.index
+    return headcount, counts
+
+
+def encode_skill_matrix(headcount, counts, top_n=TOP_SKILLS_PER_GROUP, min_share=MIN_SHARE, max_groups=MAX_GROUPS):
+    """
+    Encodes the aggregate as compact lines of the form
+    `department | role | n=<headcount> | skill 62%, skill 40%, ...`.
+    """
+    if len(headcount) > max_groups:
+        headcount, counts = collapse_roles(headcount, counts)
+
+    shares = counts.div(headcount.clip(lower=1), axis=0)
+    lines = ["department | role | n=headcount | share of employees with each skill"]
+    for (department, role), row in shares.iterrows():
+        top = row[row >= min_share].nlargest(top_n)
+        skills = ", ".join(f"{skill} {share:.0%}" for skill, share in top.items()) or "(no common skills)"
+        lines.append(f"{department} | {role} | n={int(headcount.loc[(department, role)])} | {skills}")
+    return "\n".join(lines)
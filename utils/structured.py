@@ -0,0 +1,200 @@
+"""
+Structured JSON output for list-shaped generations (quiz questions, storyboard
+scenes), and for single objects such as a scenario analysis.
+
+Requests use the API's json_schema response format, wrapping the item list in
+an {"items": [...]} object. Items are decoded one at a time with
+iter_json_items(), so a truncated or partly malformed response still yields
+every complete item, and each item is validated on its own. Only the items
+that fail validation, plus any that are missing, are asked for again in a
+short follow-up on the same conversation, instead of regenerating everything.
+"""
+import json
+import re
+
+from utils.llm import DEFAULT_MODEL, chat_completion
+
+MAX_REPAIR_ROUNDS = 2
+
+_ITEMS_START = re.compile(r'"items"\s*:\s*\[')
+_SEPARATORS = " \t\r\n,"
+
+
+class StructuredOutputError(Exception):
+    pass
+
+
+class ItemSchema:
+    """
+    JSON schema of one list item plus a validator that normalises an item in
+    place and returns a list of problems (empty if the item is usable).
+    """
+
+    def __init__(self, name, item_schema, validate):
+        self.name = name
+        self.item_schema = item_schema
+        self.validate = validate
+
+    def _format(self, schema):
+        return {"type": "json_schema", "json_schema": {"name": self.name, "strict": True, "schema": schema}}
+
+    def response_format(self):
+        return self._format({
+            "type": "object",
+            "properties": {"items": {"type": "array", "items": self.item_schema}},
+            "required": ["items"],
+            "additionalProperties": False,
+        })
+
+    def object_format(self):
+        """
+        Response format for an answer that is a single item rather than a list.
+        """
+        return self._format(self.item_schema)
+
+
+def _string_problem(item, field, min_length=1):
+    value = item.get(field)
+    if not isinstance(value, str) or len(value.strip()) < min_length:
+        return f"'{field}' must be a non-empty string"
+    item[field] = value.strip()
+    return None
+
+
+def validate_quiz_item(item):
+    if not isinstance(item, dict):
+        return ["item must be an object"]
+    problems = [p for p in (_string_problem(item, f) for f in ("question", "correct_answer", "explanation")) if p]
+    options = item.get("options")
+    if not isinstance(options, list) or not all(isinstance(o, str) and o.strip() for o in options):
+        problems.append("'options' must be a list of non-empty strings")
+        return problems
+    options = [o.strip() for o in options]
+    item["options"] = options
+    if len(options) < 2 or len(set(options)) != len(options):
+        problems.append("'options' must hold at least two distinct answers")
+
+    answer = item.get("correct_answer")
+    if isinstance(answer, str) and answer not in options:
+        # Common slip: answering with the option letter, e.g. "B"
+        letter = answer.strip().rstrip(").").upper()
+        if len(letter) == 1 and 0 <= ord(letter) - ord("A") < len(options):
+            item["correct_answer"] = options[ord(letter) - ord("A")]
+        else:
+            problems.append("'correct_answer' must be exactly one of the options")
+    return problems
+
+
+def validate_scene(item):
+    if not isinstance(item, dict):
+        return ["item must be an object"]
+    return [p for p in (_string_problem(item, "visual_description", 10), _string_problem(item, "narration")) if p]
+
+
+QUIZ_ITEM = ItemSchema("quiz_questions", {
+    "type": "object",
+    "properties": {
+        "question": {"type": "string"},
+        "options": {"type": "array", "items": {"type": "string"}},
+        "correct_answer": {"type": "string"},
+        "explanation": {"type": "string"},
+    },
+    "required": ["question", "options", "correct_answer", "explanation"],
+    "additionalProperties": False,
+}, validate_quiz_item)
+
+STORYBOARD_SCENE = ItemSchema("storyboard_scenes", {
+    "type": "object",
+    "properties": {
+        "scene": {"type": "integer"},
+        "visual_description": {"type": "string"},
+        "narration": {"type": "string"},
+    },
+    "required": ["scene", "visual_description", "narration"],
+    "additionalProperties": False,
+}, validate_scene)
+
+
+def iter_json_items(text, start=0):
+    """
+    Yields (item, end) for each complete element of the "items" array in a
+    possibly incomplete JSON text, where `end` is the offset just past the
+    element. Stops quietly at the first element that cannot be decoded yet.
+    """
+    decoder = json.JSONDecoder()
+    if start == 0:
+        match = _ITEMS_START.search(text)
+        if not match:
+            return
+        start = match.end()
+    position = start
+    while True:
+        while position < len(text) and text[position] in _SEPARATORS:
+            position += 1
+        if position >= len(text) or text[position] == "]":
+            return
+        try:
+            item, position = decoder.raw_decode(text, position)
+        except json.JSONDecodeError:
+            return
+        yield item, position
+
+
+def parse_items(text):
+    return [item for item, _ in iter_json_items(text or "")]
+
+
+def _repair_prompt(invalid, missing):
+    parts = []
+    if invalid:
+        listing = "\n".join(
+            f"- {json.dumps(item, ensure_ascii=False)}\n  Problems: {'; '.join(problems)}" for item, problems in invalid
+        )
+        parts.append(f"These items from your answer are invalid:\n{listing}\nReturn a corrected version of each, in the same order.")
+    if missing:
+        parts.append(f"{'Then add' if invalid else 'Add'} {missing} new items that do not repeat any earlier ones.")
+    total = len(invalid) + missing
+    parts.append(f"Return exactly {total} items in the same JSON format, and nothing else.")
+    return "\n\n".join(parts)
+
+
+def generate_items(schema, messages, count, api_key, model=DEFAULT_MODEL, min_count=None,
+                   max_repair_rounds=MAX_REPAIR_ROUNDS, **params):
+    """
+    Requests up to `count` items matching `schema` and returns the valid ones
+    in order. Invalid items, and missing ones below `min_count` (default
+    `count`), are re-requested up to max_repair_rounds times. Raises
+    StructuredOutputError if no valid item could be obtained.
+    """
+    min_count = count if min_count is None else min_count
+    messages = list(messages)
+    response = chat_completion(messages, api_key, model=model, response_format=schema.response_format(), **params)
+    slots = [None] * count  # Valid item per position, None until filled
+    candidates = parse_items(response)[:count]
+
+    for round_number in range(max_repair_rounds + 1):
+        invalid = []
+        open_slots = [i for i, item in enumerate(slots) if item is None]
+        for slot, item in zip(open_slots, candidates):
+            problems = schema.validate(item)
+            if problems:
+                invalid.append((item, problems))
+            else:
+                slots[slot] = item
+
+        filled = sum(item is not None for item in slots)
+        missing = max(0, min_count - filled - len(invalid))
+        if not invalid and missing <= 0 or round_number == max_repair_rounds:
+            break
+
+        messages += [
+            {"role": "assistant", "content": response or ""},
+            {"role": "user", "content": _repair_prompt(invalid, missing)},
+        ]
+        response = chat_completion(messages, api_key, model=model, response_format=schema.response_format(), **params)
+        candidates = parse_items(response)
+
+    items = [item for item in slots if item is not None]
+    if not items:
+        raise StructuredOutputError(f"The model did not return any valid {schema.name.replace('_', ' ')}.")
+    return items
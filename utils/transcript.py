@@ -0,0 +1,115 @@
+"""
+Bounded chat transcript rendering and storage.
+
+Only the last VISIBLE_MESSAGES bubbles are drawn on each rerun; earlier ones
+are rendered a page at a time, and only when the user asks for them. Session
+state keeps at most MAX_SESSION_MESSAGES messages: the oldest turns beyond that
+are appended to user_data/<name>_<chat>_<conversation>_transcript.jsonl and
+dropped from the session. Each conversation (a browser tab, restarted on a
+persona change) gets its own file, so tabs never read each other's history.
+When a conversation first spills, the user's files for that chat beyond the
+newest TRANSCRIPT_KEEP, or older than TRANSCRIPT_RETENTION_DAYS, are deleted.
+"""
+import glob
+import itertools
+import json
+import os
+import time
+
+import streamlit as st
+
+from utils.paths import get_user_data_file
+
+VISIBLE_MESSAGES = 20
+PAGE_SIZE = 20
+MAX_SESSION_MESSAGES = 100
+TRANSCRIPT_KEEP = int(os.getenv("TRANSCRIPT_KEEP", "20"))
+TRANSCRIPT_RETENTION_DAYS = float(os.getenv("TRANSCRIPT_RETENTION_DAYS", "30"))
+
+
+def transcript_file(username, chat_name, conversation_id):
+    return get_user_data_file(username, f"{chat_name}_{conversation_id}_transcript", ext="jsonl")
+
+
+def spill_messages(username, chat_name, conversation_id, messages):
+    with open(transcript_file(username, chat_name, conversation_id), "a", encoding="utf-8") as f:
+        f.writelines(json.dumps(m, ensure_ascii=False) + "\n" for m in messages)
+
+
+def prune_transcripts(username, chat_name, keep=TRANSCRIPT_KEEP, retention_days=TRANSCRIPT_RETENTION_DAYS):
+    """
+    Deletes the user's spilled transcripts for this chat beyond the newest
+    `keep`, and any older than `retention_days`.
+    """
+    entries = []
+    for path in glob.glob(transcript_file(username, chat_name, "*")):
+        try:
+            entries.append((os.path.getmtime(path), path))
+        except OSError:
+            continue
+    cutoff = time.time() - retention_days * 86400
+    for rank, (mtime, path) in enumerate(sorted(entries, reverse=True)):
+        if rank >= keep or mtime < cutoff:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def load_spilled(username, chat_name, conversation_id, start, stop):
+    """
+    Returns spilled messages start..stop (0 being the oldest). Only those
+    lines are parsed and kept; earlier ones are skipped, later ones not read.
+    """
+    path = transcript_file(username, chat_name, conversation_id)
+    if stop <= start or not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in itertools.islice(f, start, stop)]
+
+
+def trim_transcript(messages, memory, username, chat_name, max_messages=MAX_SESSION_MESSAGES):
+    """
+    Moves the oldest messages out of session state once the history is
+    longer than max_messages, whether or not they have been summarized yet.
+    """
+    excess = len(messages) - max_messages
+    if excess <= 0:
+        return
+    if not memory.spilled:
+        prune_transcripts(username, chat_name)
+    spill_messages(username, chat_name, memory.conversation_id, messages[:excess])
+    memory.discard_prefix(excess)
+    del messages[:excess]
+
+
+def _render_messages(messages):
+    for message in messages:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+
+
+def render_transcript(messages, memory, username, chat_name, visible=VISIBLE_MESSAGES):
+    """
+    Draws the recent messages, with earlier history available page by page.
+    """
+    in_session_older = max(len(messages) - visible, 0)
+    older_count = memory.spilled + in_session_older
+
+    if older_count and st.toggle(f"Show {older_count} earlier messages", key=f"{chat_name}_show_history"):
+        pages = -(-older_count // PAGE_SIZE)
+        page = st.number_input("History page", min_value=1, max_value=pages, value=pages, key=f"{chat_name}_history_page")
+        start = (page - 1) * PAGE_SIZE
+        stop = min(start + PAGE_SIZE, older_count)
+
+        page_messages = []
+        if start < memory.spilled:
+            page_messages.extend(
+                load_spilled(username, chat_name, memory.conversation_id, start, min(stop, memory.spilled))
+            )
+        if stop > memory.spilled:
+            page_messages.extend(messages[max(start - memory.spilled, 0):stop - memory.spilled])
+        _render_messages(page_messages)
+        st.divider()
+
+    _render_messages(messages[in_session_older:])
@@ -0,0 +1,161 @@
+"""
+Chunked, cached text-to-speech.
+
+Text is split on sentence boundaries and each sentence is synthesized on a
+bounded worker pool. Every chunk's MP3 is cached on disk under
+user_data/tts_cache keyed by a hash of (backend, lang, text), so editing one
+sentence of a script only re-synthesizes that sentence; once the cache grows
+past TTS_CACHE_MAX_BYTES the least recently used files are evicted. MP3
+segments are joined frame stream to frame stream, without re-encoding, or
+yielded one by one with iter_segments() so playback can start after the first
+sentence.
+
+The synthesis backend is swappable with set_backend(); anything with a
+synthesize(text, lang) -> bytes method works. Cached audio is keyed on the
+backend's `name` attribute (or its class), so a swapped-in backend never gets
+another backend's audio.
+"""
+import hashlib
+import io
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.disk_cache import DiskLRU
+from utils.lazy import lazy_import
+from utils.paths import ensure_data_dir
+
+gtts = lazy_import("gtts")
+
+MAX_CHUNK_CHARS = 400
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "4"))
+CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+_SENTENCE_END = re.compile(r'(?<=[.!?…])\s+|\n+')
+
+
+class GTTSBackend:
+    name = "gtts"
+
+    def synthesize(self, text, lang):
+        fp = io.BytesIO()
+        gtts.gTTS(text=text, lang=lang).write_to_fp(fp)
+        return fp.getvalue()
+
+
+_backend = GTTSBackend()
+
+
+def get_backend():
+    return _backend
+
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
+
+
+def _split_long(sentence, max_chars):
+    """
+    Splits an over-long sentence at the last comma that fits, or failing that
+    the last space, so no piece exceeds max_chars.
+    """
+    pieces = []
+    while len(sentence) > max_chars:
+        cut = sentence.rfind(", ", 0, max_chars)
+        if cut <= 0:
+            cut = sentence.rfind(" ", 0, max_chars)
+        end = cut + 1 if cut > 0 else max_chars
+        pieces.append(sentence[:end].strip())
+        sentence = sentence[end:].strip()
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+
+def split_sentences(text, max_chars=MAX_CHUNK_CHARS):
+    chunks = []
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if sentence:
+            chunks.extend(_split_long(sentence, max_chars))
+    return chunks
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DiskLRU(ensure_data_dir("tts_cache"), CACHE_MAX_BYTES, ".mp3")
+    return _cache
+
+
+def backend_name(backend):
+    return getattr(backend, "name", None) or f"{type(backend).__module__}.{type(backend).__qualname__}"
+
+
+def _cache_key(text, lang, backend):
+    return hashlib.sha256(f"{backend_name(backend)}\0{lang}\0{text}".encode("utf-8")).hexdigest()
+
+
+def synthesize_chunk(text, lang="en", backend=None):
+    """
+    Returns the MP3 bytes for one chunk, from the disk cache when possible.
+    """
+    backend = backend or get_backend()
+    cache = _get_cache()
+    path = cache.path(_cache_key(text, lang, backend))
+    try:
+        with open(path, "rb") as f:
+            audio = f.read()
+        cache.touch(path)
+        return audio
+    except OSError:
+        # Not cached, or evicted since
+        pass
+
+    audio = backend.synthesize(text, lang)
+    cache.write(path, audio)
+    return audio
+
+
+def _strip_id3(data):
+    """
+    Drops a leading ID3v2 tag so joined segments form one continuous MP3 frame stream.
+    """
+    if data[:3] != b"ID3" or len(data) < 10:
+        return data
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    return data[10 + size:]
+
+
+def join_mp3(segments):
+    segments = list(segments)
+    if not segments:
+        return b""
+    return segments[0] + b"".join(_strip_id3(segment) for segment in segments[1:])
+
+
+def iter_segments(text, lang="en", backend=None, workers=TTS_WORKERS):
+    """
+    Yields one MP3 segment per sentence, in order, as soon as each is ready.
+    All sentences are submitted up front, so later ones synthesize while the
+    first is being played.
+    """
+    chunks = split_sentences(text)
+    if not chunks:
+        return
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-worker")
+    try:
+        futures = [pool.submit(synthesize_chunk, chunk, lang, backend) for chunk in chunks]
+        for future in futures:
+            yield future.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
@@ -0,0 +1,96 @@
+"""
+Fast slideshow renderer for the Text-to-Video Generator.
+
+The Ken Burns zoom is done as a nearest-neighbour crop-and-scale with numpy
+index arrays that are computed once per clip, instead of moviepy resampling
+the full image with PIL on every output frame. Clips of equal size are
+concatenated with method="chain", which skips the compositing pass.
+"""
+import os
+
+import numpy as np
+from PIL import Image
+
+from utils.lazy import lazy_import
+
+# moviepy.editor probes for ffmpeg and pulls in imageio on import
+editor = lazy_import("moviepy.editor")
+
+FPS = 24
+ZOOM_RATE = 0.05  # Relative zoom per second, same as the old clip.resize(lambda t: 1 + 0.05 * t)
+
+# Output edge length in pixels; DALL-E 3 scenes are square 1024x1024 images
+RESOLUTIONS = {"1024p (source)": 1024, "720p": 720, "480p": 480}
+ENCODER_PRESETS = ["ultrafast", "veryfast", "faster", "medium"]
+DEFAULT_RESOLUTION = "720p"
+DEFAULT_PRESET = "veryfast"
+
+
+def _zoom_indices(length, out_size, scales):
+    """
+    Source row (or column) indices for each output frame: the centre
+    1/scale of the axis, stretched over out_size pixels.
+    """
+    crop = length / scales[:, None]
+    start = (length - crop) / 2
+    positions = start + (np.arange(out_size)[None, :] + 0.5) * crop / out_size
+    return np.clip(positions.astype(np.int32), 0, length - 1)
+
+
+def ken_burns_clip(frame, duration, size, fps=FPS, zoom_rate=ZOOM_RATE):
+    """
+    Returns a size x size VideoClip that slowly zooms into the centre of frame.
+    """
+    n_frames = max(int(np.ceil(duration * fps)), 1)
+    max_scale = 1 + zoom_rate * duration
+
+    # Pre-scale once so per-frame sampling never downsamples by more than max_scale
+    source_size = int(np.ceil(size * max_scale))
+    if frame.shape[0] != source_size or frame.shape[1] != source_size:
+        frame = np.asarray(Image.fromarray(frame).resize((source_size, source_size), Image.LANCZOS))
+
+    scales = 1 + zoom_rate * (np.arange(n_frames) / fps)
+    rows = _zoom_indices(frame.shape[0], size, scales)
+    cols = _zoom_indices(frame.shape[1], size, scales)
+
+    def make_frame(t):
+        i = min(int(t * fps), n_frames - 1)
+        return frame[rows[i][:, None], cols[i][None, :]]
+
+    return editor.VideoClip(make_frame, duration=duration)
+
+
+def render_video(frames, output_path, audio_path=None, duration_per_scene=None,
+                 resolution=RESOLUTIONS[DEFAULT_RESOLUTION], preset=DEFAULT_PRESET, threads=None, fps=FPS, temp_dir=None):
+    """
+    Renders one zooming clip per frame into an H.264 MP4 at output_path.
+    Without an explicit duration_per_scene the narration length is split
+    evenly across the frames.
+    """
+    audio = editor.AudioFileClip(audio_path) if audio_path else None
+    if duration_per_scene is None:
+        duration_per_scene = audio.duration / len(frames) if audio is not None else 3.0
+
+    clips = [ken_burns_clip(frame, duration_per_scene, resolution, fps) for frame in frames]
+    method = "chain" if len({clip.size for clip in clips}) == 1 else "compose"
+    video = editor.concatenate_videoclips(clips, method=method)
+    if audio is not None:
+        video = video.set_audio(audio)
+
+    temp_dir = temp_dir or os.path.dirname(os.path.abspath(output_path))
+    try:
+        video.write_videofile(
+            output_path,
+            fps=fps,
+            codec="libx264",
+            audio_codec="aac",
+            preset=preset,
+            threads=threads or os.cpu_count(),
+            temp_audiofile=os.path.join(temp_dir, "temp_audio.m4a"),
+            logger=None,
+        )
+    finally:
+        video.close()
+        if audio is not None:
+            audio.close()
+    return output_path